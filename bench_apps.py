@@ -0,0 +1,608 @@
+"""
+bench_apps.py
+
+Streamlit `AppTest`로 네 앱(hr / geopark / nintendo / pokemon)을 브라우저 없이 실행하며 측정하는 벤치마크
+- 콜드 스타트: 새 프로세스에서의 첫 실행 (모듈 import, 빈 캐시 포함)
+- 상호작용(업로드, 위젯 변경, 버튼 클릭)마다 재실행 지연 시간, 아무것도 바꾸지 않은 재실행(중앙값)
+- 첫 화면까지 시간: 실행 요청부터 스크립트가 첫 Streamlit 호출(perf.start_run)에 닿기까지 — 모듈 import 포함
+- 같은 재실행의 스크립트 자체 실행 시간 (perf.py의 JSON Lines 로그 — AppTest 대기 시간 제외, import 제외)
+- 각 단계까지의 최대 메모리(RSS)
+
+입력은 모두 합성 데이터이고 네트워크를 쓰지 않습니다.
+- hr: 별 목록 CSV / geopark: 좌표가 있는 POI CSV (지오코딩은 오프라인 지명 사전 백엔드)
+- nintendo: 게임 카탈로그 JSONL (이미지 없음) / pokemon: 127.0.0.1에 띄운 가짜 PokeAPI
+크기마다 별도 프로세스와 임시 폴더(캐시 파일 포함)에서 실행하므로 결과가 서로 섞이지 않습니다.
+
+사용법:
+    python bench_apps.py [--apps hr geopark ...] [--sizes N ...] [--repeat R] [--json 결과.json] [--compare 기준.json]
+
+--repeat R이면 같은 경우를 새 프로세스에서 R번 실행해 단계별 중앙값을 씁니다 (콜드 스타트는 잡음이 큼).
+--json으로 저장한 결과를 --compare에 넘기면 같은 앱/크기/단계끼리 변화율을 함께 보여 줍니다.
+
+    python bench_apps.py --check [--apps hr geopark] [--sizes N ...]
+
+--check는 벤치마크 대신 hr의 HRIndex, geopark의 GeoIndex / SearchIndex 결과를 전수 비교와 맞춰 보고
+하나라도 다르면 종료 코드 1로 끝납니다 (색인 모듈 hr_index / geo_index / geo_search를 직접 씀).
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from geo_index import GeoIndex, haversine_km
+from geo_search import SearchIndex, normalize_texts, to_choseong, to_jamo
+from hr_index import HRIndex
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = {
+    'hr': [10_000, 100_000, 1_000_000],
+    'geopark': [1_000, 10_000, 100_000],
+    'nintendo': [1_000, 10_000, 100_000],
+    'pokemon': [1_000, 10_000],  # 가짜 PokeAPI의 포켓몬 수
+}
+IDLE_RERUNS = 5
+TIMEOUT = 600  # AppTest 한 번 실행의 제한 시간(초)
+POKE_CARDS = 12  # 한 번에 조회하는 카드 수
+
+# ----------------------
+# 합성 데이터
+# ----------------------
+SPECTRAL = 'OBAFGKM'
+REGIONS = ['서울', '부산', '제주', '강원', '경주', '전주', '청송', '울릉', '무등산', '한탄강']
+KINDS = ['지질공원', '전망대', '폭포', '동굴', '주상절리', '해변', '박물관', '캠핑장']
+QUESTIONS = [
+    ('모험/스토리', '액션', '퍼즐/전략', '시뮬레이션', '캐주얼'),
+    ('혼자', '친구/가족과', '상관없음'),
+    ('쉬움', '적당함', '어려움'),
+    ('귀엽고 아기자기', '리얼리틱', '픽셀/레트로', '상관없음'),
+    ('짧게 즐기고 싶다', '적당히 즐기고 싶다', '긴 시간 몰입'),
+]
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'  # --check의 초성 검색어 판정용
+WORDS = ['친구', '함께', '귀여운', '레이싱', '모험', '퍼즐', '전략', '탐험', '오픈월드', '파티',
+         '리듬', '농장', '던전', '보스', '수집', '협동', '대전', '스토리', '픽셀', '섬']
+
+
+def write_star_csv(path, n, seed=0):
+    """Teff / B-V / 분광형 / 반지름 / 겉보기 등급 / 거리 열을 가진 별 목록 (일부 값은 비어 있음)."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    teff = rng.uniform(2500, 40000, n)
+    frame = pd.DataFrame({
+        'name': [f'star-{i}' for i in range(n)],
+        'teff': np.where(rng.random(n) < 0.2, np.nan, teff.round()),
+        'bv': (7090 / teff - 0.02).round(3),
+        'spectral': [f'{SPECTRAL[c]}{s}V' for c, s in zip(rng.integers(0, 7, n), rng.integers(0, 10, n))],
+        'radius': np.where(rng.random(n) < 0.3, np.nan, 10 ** rng.normal(0, 0.8, n)).round(3),
+        'mv': rng.uniform(-2, 15, n).round(2),
+        'dist_pc': rng.uniform(1, 2000, n).round(1),
+    })
+    frame.to_csv(path, index=False)
+
+
+def write_poi_csv(path, n, seed=0):
+    """대한민국 범위 안의 이름/위도/경도/설명 POI 목록."""
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('name,latitude,longitude,description\n')
+        for i in range(n):
+            region, kind = rnd.choice(REGIONS), rnd.choice(KINDS)
+            f.write(f'{region} {kind} {i},{rnd.uniform(33.1, 38.6):.5f},{rnd.uniform(124.6, 131.9):.5f},'
+                    f'{region}의 {kind} {rnd.choice(KINDS)}\n')
+
+
+def write_gazetteer(path):
+    """내장 목록용 지오코딩이 네트워크에 나가지 않도록 쓰는 (거의) 빈 지명 사전."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('name,latitude,longitude\n벤치마크,0,0\n')
+
+
+def write_game_catalog(path, n, seed=0):
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            record = {
+                'name': f'게임 {i}',
+                'tags': [rnd.choice(options) for options in QUESTIONS],
+                'description': ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 30))),
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def tiny_png(width=96, height=96):
+    """Pillow 없이 만드는 단색 PNG (가짜 스프라이트)."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    rows = b''.join(b'\x00' + b'\xff\x00\x00' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 기본값 5면 동시 연결(최대 FETCH_WORKERS개)이 1초 SYN 재전송에 걸림
+
+
+class MockPokeAPI:
+    """pokemon.py가 쓰는 엔드포인트만 흉내 내는 로컬 PokeAPI. 포켓몬 3마리가 한 진화 체인."""
+
+    def __init__(self, n):
+        self.names = [f'mon{i}' for i in range(n)]
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.sprite = tiny_png()
+        self.server = _Server(('127.0.0.1', 0), self._handler())
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}/api/v2'
+
+    def _chain(self, chain_id):
+        names = self.names[chain_id * 3:chain_id * 3 + 3]
+        link = None
+        for name in reversed(names):
+            link = {'species': {'name': name, 'url': f'{self.base}/pokemon-species/{name}/'},
+                    'evolves_to': [link] if link else []}
+        return link
+
+    def route(self, path):
+        parts = path.split('?')[0].strip('/').split('/')[2:]
+        known = self.position
+        if parts in (['pokemon'], ['pokemon-species']):
+            return {'count': len(self.names),
+                    'results': [{'name': n, 'url': f'{self.base}/{parts[0]}/{n}/'} for n in self.names]}
+        if parts == ['evolution-chain']:
+            chains = range((len(self.names) + 2) // 3)
+            return {'count': len(chains), 'results': [{'url': f'{self.base}/evolution-chain/{c}/'} for c in chains]}
+        if len(parts) == 2 and parts[1] in known and parts[0] == 'pokemon':
+            host = self.base.rsplit('/api/', 1)[0]
+            return {'name': parts[1], 'types': [{'type': {'name': 'normal'}}],
+                    'moves': [{'move': {'name': f'move-{m}'}} for m in range(8)],
+                    'sprites': {'front_default': f'{host}/sprite/{parts[1]}.png'},
+                    'species': {'name': parts[1], 'url': f'{self.base}/pokemon-species/{parts[1]}/'}}
+        if len(parts) == 2 and parts[1] in known and parts[0] == 'pokemon-species':
+            chain_id = self.position[parts[1]] // 3
+            return {'name': parts[1], 'evolution_chain': {'url': f'{self.base}/evolution-chain/{chain_id}/'}}
+        if len(parts) == 2 and parts[0] == 'evolution-chain' and parts[1].isdigit():
+            return {'id': int(parts[1]), 'chain': self._chain(int(parts[1]))}
+        return None
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith('/sprite/'):
+                    self._send(200, 'image/png', api.sprite)
+                    return
+                data = api.route(self.path)
+                if data is None:
+                    self._send(404, 'text/plain', b'Not Found')
+                else:
+                    self._send(200, 'application/json', json.dumps(data).encode())
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+# ----------------------
+# 시나리오: (앱 파일, [(단계 이름, AppTest를 조작하는 함수)])
+# ----------------------
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def hr_scenario(workdir, n):
+    path = os.path.join(workdir, 'stars.csv')
+    write_star_csv(path, n)
+    with open(path, 'rb') as f:
+        data = f.read()
+    os.environ['HR_CACHE_DIR'] = os.path.join(workdir, 'hr_cache')
+
+    def map_columns(at):
+        for label, col in [('Teff column', 'teff'), ('B-V column', 'bv'), ('Spectral column', 'spectral'),
+                           ('Radius column', 'radius'), ('mV column', 'mv'), ('Distance column', 'dist_pc')]:
+            widget(at.sidebar.selectbox, label).set_value(col)
+
+    return 'hr.py', [
+        ('upload', lambda at: at.sidebar.file_uploader[0].set_value(('stars.csv', data, 'text/csv'))),
+        ('map columns', map_columns),
+        ('render: density', lambda at: widget(at.sidebar.selectbox, 'Render mode').set_value('Density')),
+        ('select: box', lambda at: widget(at.sidebar.selectbox, 'Select stars').set_value('Box')),
+    ]
+
+
+def geopark_scenario(workdir, n):
+    path = os.path.join(workdir, 'poi.csv')
+    write_poi_csv(path, n)
+    with open(path, 'rb') as f:
+        data = f.read()
+    gazetteer = os.path.join(workdir, 'gazetteer.csv')
+    write_gazetteer(gazetteer)
+    os.environ.update({
+        'GEOCODE_DB_PATH': os.path.join(workdir, 'geocode.sqlite3'),
+        'GEOCODER': 'gazetteer',
+        'GAZETTEER_PATH': gazetteer,
+        'GEOCODER_URL': 'http://127.0.0.1:9',  # 혹시 nominatim이 선택돼도 외부로 나가지 않음
+    })
+    return 'geopark.py', [
+        ('upload', lambda at: widget(at.sidebar.file_uploader, '지오파크 CSV 업로드')
+         .set_value(('poi.csv', data, 'text/csv'))),
+        ('search: word', lambda at: at.text_input(key='geo_query').set_value('폭포')),
+        ('search: choseong', lambda at: at.text_input(key='geo_query').set_value('ㅈㅅㅈㄹ')),
+        ('page 2', lambda at: at.number_input(key='geo_page').set_value(2)),
+        ('nearby: radius', lambda at: widget(at.sidebar.radio, '주변 검색').set_value('반경 안')),
+        ('zoom 10', lambda at: widget(at.sidebar.slider, '확대 수준').set_value(10)),
+    ]
+
+
+def nintendo_scenario(workdir, n):
+    path = os.path.join(workdir, 'games.jsonl')
+    write_game_catalog(path, n)
+    os.environ.update({'NINTENDO_CATALOG': path, 'SPRITE_CACHE_DIR': os.path.join(workdir, 'sprites')})
+    return 'nintendo.py', [
+        ('recommend', lambda at: at.button[0].click()),
+        ('answer change', lambda at: at.radio[0].set_value('액션')),
+        ('describe', lambda at: at.text_input[0].set_value('친구와 함께하는 귀여운 레이싱')),
+    ]
+
+
+def pokemon_scenario(workdir, n, api):
+    os.environ.update({
+        'POKEAPI_BASE': api.base,
+        'POKE_CACHE_PATH': os.path.join(workdir, 'pokeapi.sqlite3'),
+        'SPRITE_CACHE_DIR': os.path.join(workdir, 'sprites'),
+    })
+    first = ', '.join(api.names[:POKE_CARDS])
+    query = lambda value: lambda at: at.text_input(key='poke_query').set_value(value)
+    return 'pokemon.py', [
+        (f'{POKE_CARDS} cards', query(first)),
+        ('typo', query(api.names[-1][:-1] + 'x')),
+        (f'{POKE_CARDS} cards (cached)', query(first)),
+        (f'{POKE_CARDS} new cards', query(', '.join(api.names[POKE_CARDS:2 * POKE_CARDS]))),
+    ]
+
+
+# ----------------------
+# 실행 / 측정
+# ----------------------
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def drive(app_file, steps):
+    """콜드 스타트 → 각 단계 → 유휴 재실행 순서로 실행하고 단계별 결과를 반환."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APP_DIR, app_file), default_timeout=TIMEOUT)
+    log = open(os.environ['PERF_LOG_PATH'], 'a+', encoding='utf-8')
+    results = []
+
+    def timed(name, action=None):
+        if action is not None:
+            action(at)
+        wall = time.time()
+        start = time.perf_counter()
+        at.run()
+        ms = (time.perf_counter() - start) * 1000
+        # st.rerun()으로 이어진 실행까지 이 단계에 기록된 모든 실행
+        runs = [json.loads(line) for line in log.readlines()]
+        error = str(at.exception[0].message) if at.exception else None
+        results.append({
+            'step': name,
+            'ms': round(ms, 1),
+            'first_ms': round((runs[0]['ts'] - wall) * 1000, 1) if runs else None,
+            'script_ms': round(sum(r['total_ms'] for r in runs), 1) if runs else None,
+            'peak_mb': peak_rss_mb(),
+            'error': error,
+        })
+        return results[-1]
+
+    timed('cold start')
+    for name, action in steps:
+        timed(name, action)
+    idle = [timed('idle rerun') for _ in range(IDLE_RERUNS)]
+    # 유휴 재실행은 중앙값 한 줄로
+    results[-IDLE_RERUNS:] = [dict(results[-1], **{
+        key: median([r[key] for r in idle]) for key in ('ms', 'first_ms', 'script_ms')})]
+    log.close()
+    return results
+
+
+def run_case(app, n):
+    """자식 프로세스에서 실행: 앱 하나, 크기 하나."""
+    with tempfile.TemporaryDirectory(prefix=f'bench-{app}-') as workdir:
+        os.chdir(workdir)  # 기본 캐시 경로(.hr_cache 등)도 임시 폴더 안으로
+        os.environ['PERF_LOG_PATH'] = os.path.join(workdir, 'perf.jsonl')
+        if app == 'pokemon':
+            with MockPokeAPI(n) as api:
+                return drive(*pokemon_scenario(workdir, n, api))
+        scenario = {'hr': hr_scenario, 'geopark': geopark_scenario, 'nintendo': nintendo_scenario}[app]
+        return drive(*scenario(workdir, n))
+
+
+def spawn(app, n):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [APP_DIR, os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', app, str(n)],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ['?']
+        return [{'step': 'cold start', 'ms': None, 'first_ms': None, 'script_ms': None, 'peak_mb': None,
+                 'error': tail[0]}]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def merge_repeats(runs):
+    """반복 실행 결과를 단계별로 합침: 시간은 중앙값, 메모리는 최댓값."""
+    merged = []
+    for steps in zip(*runs):
+        peaks = [s['peak_mb'] for s in steps if s['peak_mb'] is not None]
+        merged.append({
+            'step': steps[0]['step'],
+            'ms': median(s['ms'] for s in steps),
+            'first_ms': median(s.get('first_ms') for s in steps),
+            'script_ms': median(s.get('script_ms') for s in steps),
+            'peak_mb': max(peaks) if peaks else None,
+            'error': next((s['error'] for s in steps if s['error']), None),
+        })
+    return merged
+
+
+def _change(new, old):
+    return f'{(new / old - 1) * 100:>+8.0f}%' if new is not None and old else f"{'-':>9}"
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_report(cases, baseline=None):
+    base = {(c['app'], c['size'], s['step']): s for c in baseline or [] for s in c['steps']}
+    header = f"{'app':<9} {'size':>9} {'step':<22} {'ms':>10} {'first ms':>9} {'script ms':>10} {'peak MB':>8}"
+    print(header + (f" {'vs base':>9} {'(first)':>9} {'(script)':>9}" if base else ''))
+    for case in cases:
+        for s in case['steps']:
+            ms = 'ERR' if s['ms'] is None else f"{s['ms']:.1f}"
+            peak = '-' if s['peak_mb'] is None else f"{s['peak_mb']:.0f}"
+            line = (f"{case['app']:<9} {case['size']:>9,} {s['step']:<22} {ms:>10} {_ms(s.get('first_ms')):>9} "
+                    f"{_ms(s.get('script_ms')):>10} {peak:>8}")
+            if base:
+                old = base.get((case['app'], case['size'], s['step']), {})
+                line += ''.join(f' {_change(s.get(key), old.get(key))}' for key in ('ms', 'first_ms', 'script_ms'))
+            if s['error']:
+                line += f"  ! {s['error'][:80]}"
+            print(line)
+
+
+# ----------------------
+# 색인 검사 (--check): 앱의 공간/검색 색인 결과를 전수 비교(brute force)와 맞춰 봄
+# ----------------------
+def _same(found, expected):
+    return np.array_equal(np.sort(found), np.sort(expected))
+
+
+def _brute_in_polygon(x, y, px, py):
+    """한 점씩 도는 짝홀 광선 판정."""
+    inside = False
+    for (x1, y1), (x2, y2) in zip(zip(px[-1:] + px[:-1], py[-1:] + py[:-1]), zip(px, py)):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def check_hr_index(n, queries, rng):
+    # 흩어진 별 + 좁은 대각선 띠 (띠 모양이면 격자 밖 질의에서 가까운 셀이 비어 있기 쉬움)
+    x = rng.uniform(3.4, 4.6, n)
+    y = np.where(rng.random(n) < 0.5, rng.normal(0.0, 2.0, n), -10 * (x - 4.0) + rng.normal(0, 0.05, n))
+    x[rng.random(n) < 0.02] = np.nan  # 좌표가 없는 별은 색인에서 빠져야 함
+    index = HRIndex(x, y)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    u, v = (x[valid] - index.x0) / index.sx, (y[valid] - index.y0) / index.sy
+    failures = []
+    for q in range(queries):
+        # 데이터 범위 밖(격자 밖) 질의도 섞음 — 사이드바 입력에는 범위 제한이 없음
+        qx, qy = (rng.uniform(3.2, 4.8), rng.uniform(-8, 8)) if rng.random() < 0.7 else \
+            (rng.uniform(-10, 20), rng.uniform(-60, 60))
+        k = int(rng.integers(1, 50))
+        rows, dist = index.nearest(qx, qy, k)
+        d = np.hypot(u - (qx - index.x0) / index.sx, v - (qy - index.y0) / index.sy)
+        if not np.allclose(dist, np.sort(d)[:k]) or not np.allclose(np.hypot(
+                (x[rows] - qx) / index.sx, (y[rows] - qy) / index.sy), dist):
+            failures.append(f'nearest({qx:.3f}, {qy:.3f}, k={k})')
+        bx, by = np.sort(rng.uniform(3.2, 4.8, 2)), np.sort(rng.uniform(-8, 8, 2))
+        expected = valid[(x[valid] >= bx[0]) & (x[valid] <= bx[1]) & (y[valid] >= by[0]) & (y[valid] <= by[1])]
+        if not _same(index.box(bx, by), expected):
+            failures.append(f'box({bx.round(3).tolist()}, {by.round(3).tolist()})')
+        m = int(rng.integers(3, 9))
+        px, py = rng.uniform(3.3, 4.7, m).tolist(), rng.uniform(-6, 6, m).tolist()
+        expected = valid[[_brute_in_polygon(x[i], y[i], px, py) for i in valid]]
+        if not _same(index.polygon(px, py), expected):
+            failures.append(f'polygon({m} vertices, #{q})')
+    return failures
+
+
+def check_geo_index(n, queries, rng):
+    # 한 지역에 몰린 지점 + 날짜 변경선·극 근처 지점
+    lat = np.concatenate([rng.uniform(33.1, 38.6, n - n // 5), rng.uniform(-89.9, 89.9, n // 5)])
+    lon = np.concatenate([rng.uniform(124.6, 131.9, n - n // 5), rng.uniform(175, 185, n // 5)])
+    lat[rng.random(n) < 0.02] = np.nan
+    index = GeoIndex(lat, lon)
+    valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    failures = []
+    for _ in range(queries):
+        qlat, qlon = (rng.uniform(33, 39), rng.uniform(124, 132)) if rng.random() < 0.5 else \
+            (rng.uniform(-90, 90), rng.uniform(-180, 180))
+        d = haversine_km(qlat, qlon, lat[valid], lon[valid])
+        radius = float(rng.choice([1, 20, 200, 3000]))
+        rows, dist = index.radius(qlat, qlon, radius)
+        if not _same(rows, valid[d <= radius]) or not np.all(np.diff(dist) >= 0):
+            failures.append(f'radius({qlat:.3f}, {qlon:.3f}, {radius:g} km)')
+        k = int(rng.integers(1, 50))
+        rows, dist = index.nearest(qlat, qlon, k)
+        if not np.allclose(dist, np.sort(d)[:k]):
+            failures.append(f'nearest({qlat:.3f}, {qlon:.3f}, k={k})')
+    return failures
+
+
+def _brute_search(names, descriptions, query):
+    """SearchIndex 문서에 적힌 규칙을 문서마다 그대로 적용한 결과."""
+    words = normalize_texts([query])[0].split()
+    if not words:
+        return np.arange(len(names))
+
+    def with_tail(text, prefix, tail):
+        return any(text.startswith(prefix, j) and to_jamo(text[j + len(prefix)]).startswith(tail)
+                   for j in range(len(text) - len(prefix)))
+
+    hits = []
+    for doc, (name, description) in enumerate(zip(names, descriptions)):
+        score = 0
+        for i, word in enumerate(words):
+            if len(word) >= 2 and all(c in CHOSEONG for c in word):
+                choseong = to_choseong(name)
+                in_name, in_description, starts, name_score = word in choseong, False, choseong.startswith(word), 2
+            elif i == len(words) - 1 and ('가' <= word[-1] <= '힣' or 'ㄱ' <= word[-1] <= 'ㅣ'):
+                prefix, tail = word[:-1], to_jamo(word[-1])
+                in_name, in_description = with_tail(name, prefix, tail), with_tail(description, prefix, tail)
+                starts, name_score = with_tail(name[:len(word)], prefix, tail), 3
+            else:
+                in_name, in_description, starts, name_score = word in name, word in description, name.startswith(word), 3
+            if not (in_name or in_description):
+                break
+            score += (name_score if in_name else 1) + (starts and in_name)
+        else:
+            hits.append((-score, len(name), doc))
+    return np.array([doc for *_, doc in sorted(hits)], dtype=np.int64)
+
+
+def check_search_index(n, queries, rng):
+    rnd = random.Random(int(rng.integers(1 << 30)))
+    raw_names = [f'{rnd.choice(REGIONS)} {rnd.choice(KINDS)}{rnd.choice(["", " " + rnd.choice(WORDS)])}'
+                 for _ in range(n)]
+    raw_descriptions = [' '.join(rnd.choice(WORDS + KINDS) for _ in range(rnd.randint(0, 6))) for _ in range(n)]
+    index = SearchIndex(raw_names, raw_descriptions)
+    names, descriptions = normalize_texts(raw_names), normalize_texts(raw_descriptions)
+
+    def typing(word):
+        # 입력 중인 마지막 글자: 초성만, 또는 받침 없이 (예: '산' -> 'ㅅ', '사')
+        last = ord(word[-1]) - 0xAC00
+        if not 0 <= last < 11172:
+            return word
+        return word[:-1] + rnd.choice([to_choseong(word[-1]), chr(0xAC00 + last // 28 * 28), word[-1]])
+
+    failures = []
+    pool = [t for t in names + descriptions if t] or ['없음']  # 빈 데이터셋에도 검색어는 만듦
+    for _ in range(queries):
+        text = rnd.choice(pool)
+        a = rnd.randrange(len(text))
+        piece = text[a:a + rnd.randint(1, 4)].strip() or text.split()[0]
+        query = rnd.choice([
+            piece,
+            typing(piece),
+            to_choseong(rnd.choice(pool).replace(' ', ''))[:rnd.randint(2, 3)],
+            f'{rnd.choice(REGIONS)} {typing(rnd.choice(KINDS))}',
+            f'{rnd.choice(WORDS)} {rnd.choice(KINDS)}',
+            '없는말',
+        ])
+        if not np.array_equal(index.search(query), _brute_search(names, descriptions, query)):
+            failures.append(repr(query))
+    return failures
+
+
+CHECKS = {
+    'hr': [('HRIndex', check_hr_index)],
+    'geopark': [('GeoIndex', check_geo_index), ('SearchIndex', check_search_index)],
+}
+CHECK_SIZES = [0, 1, 2_000]
+CHECK_QUERIES = 200
+
+
+def run_checks(apps, sizes):
+    """모든 색인 검사를 실행하고 실패가 하나라도 있으면 False."""
+    ok = True
+    for app in apps:
+        for name, check in CHECKS.get(app, []):
+            for n in sizes:
+                failures = check(n, CHECK_QUERIES, np.random.default_rng(n))
+                print(f"{app:<9} {name:<12} {n:>9,} {'ok' if not failures else f'FAIL {len(failures)}/{CHECK_QUERIES}'}")
+                for failure in failures[:5]:
+                    print(f'    {failure}')
+                ok = ok and not failures
+    return ok
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Streamlit 앱 재실행 지연 시간 / 메모리 벤치마크')
+    parser.add_argument('--apps', nargs='+', choices=list(DEFAULT_SIZES), default=list(DEFAULT_SIZES))
+    parser.add_argument('--sizes', nargs='+', type=int, help='모든 앱에 같은 크기 사용 (기본: 앱마다 다름)')
+    parser.add_argument('--repeat', type=int, default=1, help='경우마다 실행 횟수 (단계별 중앙값)')
+    parser.add_argument('--json', help='결과를 JSON으로 저장')
+    parser.add_argument('--compare', help='--json으로 저장한 기준 결과와 비교')
+    parser.add_argument('--check', action='store_true', help='벤치마크 대신 색인 검사 (전수 비교)')
+    parser.add_argument('--child', nargs=2, metavar=('APP', 'SIZE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_case(args.child[0], int(args.child[1]))))
+        return
+    if args.check:
+        sys.exit(0 if run_checks(args.apps, args.sizes or CHECK_SIZES) else 1)
+
+    cases = []
+    for app in args.apps:
+        for n in args.sizes or DEFAULT_SIZES[app]:
+            print(f'... {app} {n:,}', file=sys.stderr)
+            runs = [spawn(app, n) for _ in range(max(args.repeat, 1))]
+            cases.append({'app': app, 'size': n, 'repeat': len(runs), 'steps': merge_repeats(runs)})
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['cases']
+    print_report(cases, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'created': time.time(), 'cases': cases}, f,
+                      ensure_ascii=False, indent=1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+"""
+bench_recommend.py
+
+기존 nintendo.py `recommend_game` (게임마다 파이썬 루프 + 전체 정렬)과
+`game_recommender.RecommendEngine` (NumPy 벡터화 + argpartition)의 속도 비교
+
+사용법:
+    python bench_recommend.py [카탈로그 크기 ...]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from game_recommender import RecommendEngine
+
+QUESTIONS = [
+    ('모험/스토리', '액션', '퍼즐/전략', '시뮬레이션', '캐주얼'),
+    ('혼자', '친구/가족과', '상관없음'),
+    ('쉬움', '적당함', '어려움'),
+    ('귀엽고 아기자기', '리얼리틱', '픽셀/레트로', '상관없음'),
+    ('짧게 즐기고 싶다', '적당히 즐기고 싶다', '긴 시간 몰입'),
+]
+
+
+def legacy_recommend_game(answers, games):
+    """변경 전 nintendo.py의 추천 함수 (비교 기준)."""
+    scores = []
+    for game in games:
+        score = sum([ans in game["tags"] for ans in answers])
+        score += random.random()  # 랜덤 가중치
+        scores.append((score, game))
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return scores[0][1]
+
+
+def synthetic_games(n, seed=0):
+    rnd = random.Random(seed)
+    return [{"name": f"game-{i}", "tags": [rnd.choice(options) for options in QUESTIONS]} for i in range(n)]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    answers = [options[0] for options in QUESTIONS]
+    rng = np.random.default_rng(0)
+    print(f"{'games':>9} {'legacy ms':>11} {'build ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for n in sizes:
+        games = synthetic_games(n)
+        repeat = 5 if n <= 10_000 else 2
+        legacy = best_of(lambda: legacy_recommend_game(answers, games), repeat)
+        start = time.perf_counter()
+        engine = RecommendEngine.from_tag_lists(g["tags"] for g in games)
+        build = time.perf_counter() - start
+        query = best_of(lambda: engine.top_k(answers, k=3, rng=rng), repeat * 4)
+        print(f"{n:>9} {legacy * 1e3:>11.2f} {build * 1e3:>10.2f} {query * 1e3:>10.3f} {legacy / query:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
@@ -0,0 +1,343 @@
+"""
+game_recommender.py
+
+nintendo.py 추천기의 카탈로그 로더와 점수 계산 엔진 (Streamlit 비의존)
+- 카탈로그는 JSON Lines / CSV / Parquet / JSON 파일에서 읽습니다. 이름과 태그, 태그 → 게임 번호
+  역색인만 메모리에 두고, 설명과 이미지 경로는 화면에 보여줄 게임만 원본 파일에서 읽습니다.
+- 게임 태그를 NumPy 지시 행렬(게임 × 태그)로 한 번만 인코딩합니다.
+- 설문 답변 5개에 해당하는 열만 더해 모든 게임 점수를 한 번에 계산합니다.
+- 동점 분산용 랜덤 가중치는 시드를 줄 수 있는 `numpy.random.Generator`로 만들고,
+  상위 k개는 전체 정렬 대신 `argpartition`으로 고릅니다.
+- "비슷한 게임" 검색용으로 설명 문장을 문자 n-gram TF-IDF 희소 행렬로 한 번 색인하고,
+  질의 벡터와의 희소 내적으로 코사인 유사도 상위 k개를 찾습니다(한국어도 음절 n-gram으로 처리).
+- 의존성: numpy, pyarrow(optional — Parquet 카탈로그용)
+"""
+
+import csv
+import json
+import math
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TAG_SEPARATOR = '|'  # CSV/Parquet 문자열 태그 구분자
+DETAILS_CACHE_SIZE = 256  # 메모리에 유지할 설명/이미지 개수
+
+
+def build_tag_index(tag_lists: Iterable[Sequence[str]]) -> Dict[str, np.ndarray]:
+    """태그 → 그 태그를 가진 게임 번호 배열 (역색인)."""
+    postings: Dict[str, List[int]] = {}
+    for idx, tags in enumerate(tag_lists):
+        for tag in set(tags):
+            postings.setdefault(tag, []).append(idx)
+    return {tag: np.asarray(ids, dtype=np.int32) for tag, ids in postings.items()}
+
+
+def _split_tags(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [t.strip() for t in value.split(TAG_SEPARATOR) if t.strip()]
+    return [str(t) for t in value]
+
+
+class GameCatalog:
+    """게임 카탈로그. 이름·태그 역색인은 메모리에, 설명/이미지는 필요할 때 읽어 LRU로 보관합니다."""
+
+    def __init__(self, names: List[str], tag_lists: Iterable[Sequence[str]],
+                 read_details: Callable[[int], dict], iter_descriptions: Callable[[], Iterator[str]]):
+        self.names = names
+        self.tag_index = build_tag_index(tag_lists)
+        self.details = lru_cache(maxsize=DETAILS_CACHE_SIZE)(read_details)
+        self._iter_descriptions = iter_descriptions
+
+    def __len__(self):
+        return len(self.names)
+
+    def game(self, idx: int) -> dict:
+        """화면 표시용 게임 정보: name, description, img."""
+        return {"name": self.names[idx], **self.details(idx)}
+
+    def iter_descriptions(self) -> Iterator[str]:
+        """모든 게임 설명을 순서대로 한 번 훑습니다 (LRU에 남기지 않음, 색인 구축용)."""
+        return self._iter_descriptions()
+
+
+def load_catalog(path: str) -> GameCatalog:
+    """확장자에 따라 카탈로그를 읽습니다 (.jsonl, .csv, .parquet, .json)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.jsonl':
+        return _load_jsonl(path)
+    if ext == '.csv':
+        return _load_csv(path)
+    if ext == '.parquet':
+        return _load_parquet(path)
+    if ext == '.json':
+        return _load_json(path)
+    raise ValueError(f"지원하지 않는 카탈로그 형식입니다: {path}")
+
+
+def _load_jsonl(path: str) -> GameCatalog:
+    names, tag_lists, offsets = [], [], []
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            names.append(record["name"])
+            tag_lists.append(_split_tags(record.get("tags")))
+            offsets.append(offset)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    def read_details(idx):
+        with open(path, 'rb') as f:
+            f.seek(int(offsets[idx]))
+            record = json.loads(f.readline())
+        return {"description": record.get("description", ""), "img": record.get("img")}
+
+    def iter_descriptions():
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line).get("description", "")
+
+    return GameCatalog(names, tag_lists, read_details, iter_descriptions)
+
+
+def _csv_records(f) -> Iterator[Tuple[int, bytes]]:
+    """(시작 오프셋, 레코드 바이트). 따옴표 안의 줄바꿈은 레코드를 끊지 않도록 다음 줄과 이어 붙입니다.
+
+    따옴표 이스케이프는 `""`이므로 따옴표 개수가 홀수면 아직 필드가 열려 있는 것입니다.
+    """
+    while True:
+        offset = f.tell()
+        record = f.readline()
+        if not record:
+            return
+        while record.count(b'"') % 2:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"카탈로그 CSV의 {offset}바이트 위치에서 시작한 따옴표가 닫히지 않았습니다.")
+            record += line
+        yield offset, record
+
+
+def _parse_csv_record(record: bytes, encoding: str = 'utf-8') -> List[str]:
+    return next(csv.reader([record.decode(encoding)]))
+
+
+def _load_csv(path: str) -> GameCatalog:
+    """한 레코드에 한 게임인 UTF-8 CSV (name, tags[, description, img]). 태그는 '|'로 구분.
+
+    설명처럼 따옴표로 감싼 필드에는 줄바꿈이 있어도 됩니다 (오프셋은 줄이 아니라 레코드 단위).
+    """
+    names, tag_lists, offsets = [], [], []
+    with open(path, 'rb') as f:
+        records = _csv_records(f)
+        header = next((_parse_csv_record(r, 'utf-8-sig') for _, r in records), [])
+        col = {c.strip().lower(): i for i, c in enumerate(header)}
+        if 'name' not in col or 'tags' not in col:
+            raise ValueError("카탈로그 CSV에는 'name'과 'tags' 컬럼이 필요합니다.")
+        for offset, record in records:
+            if not record.strip():
+                continue
+            row = _parse_csv_record(record)
+            names.append(row[col['name']])
+            tag_lists.append(_split_tags(row[col['tags']]))
+            offsets.append(offset)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    def read_details(idx):
+        with open(path, 'rb') as f:
+            f.seek(int(offsets[idx]))
+            row = _parse_csv_record(next(_csv_records(f))[1])
+        get = lambda key: row[col[key]] if key in col and col[key] < len(row) else None
+        return {"description": get('description') or "", "img": get('img')}
+
+    def iter_descriptions():
+        i = col.get('description')
+        with open(path, 'rb') as f:
+            records = _csv_records(f)
+            next(records, None)
+            for _, record in records:
+                if not record.strip():
+                    continue
+                row = _parse_csv_record(record)
+                yield row[i] if i is not None and i < len(row) else ""
+
+    return GameCatalog(names, tag_lists, read_details, iter_descriptions)
+
+
+def _load_parquet(path: str) -> GameCatalog:
+    # pyarrow는 Parquet 카탈로그를 읽을 때만 import (다른 형식은 시작이 빨라짐)
+    try:
+        import pyarrow.parquet as pq
+    except Exception:
+        raise ImportError("Parquet 카탈로그를 읽으려면 `pip install pyarrow`가 필요합니다.")
+    pf = pq.ParquetFile(path)
+    table = pf.read(columns=['name', 'tags'])
+    names = table.column('name').to_pylist()
+    tag_lists = [_split_tags(t) for t in table.column('tags').to_pylist()]
+    detail_cols = [c for c in ('description', 'img') if c in pf.schema_arrow.names]
+    starts = np.cumsum([0] + [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)])
+
+    def read_details(idx):
+        group = bisect_right(starts, idx) - 1
+        row = pf.read_row_group(group, columns=detail_cols).slice(idx - starts[group], 1).to_pylist()[0]
+        return {"description": row.get('description') or "", "img": row.get('img')}
+
+    def iter_descriptions():
+        if 'description' not in detail_cols:
+            yield from ("" for _ in names)
+            return
+        for group in range(pf.num_row_groups):
+            for text in pf.read_row_group(group, columns=['description']).column(0).to_pylist():
+                yield text or ""
+
+    return GameCatalog(names, tag_lists, read_details, iter_descriptions)
+
+
+def _load_json(path: str) -> GameCatalog:
+    """JSON 배열 — 한 번에 파싱해야 하므로 설명도 메모리에 남습니다. 큰 카탈로그는 .jsonl 권장."""
+    with open(path, encoding='utf-8') as f:
+        records = json.load(f)
+    details = [{"description": r.get("description", ""), "img": r.get("img")} for r in records]
+    return GameCatalog([r["name"] for r in records], [_split_tags(r.get("tags")) for r in records],
+                       details.__getitem__, lambda: (d["description"] for d in details))
+
+
+class RecommendEngine:
+    """태그 일치 개수 + 랜덤 가중치로 상위 k개 게임을 고르는 벡터화 엔진."""
+
+    def __init__(self, n_games: int, tag_index: Dict[str, np.ndarray]):
+        self.vocab = {tag: i for i, tag in enumerate(sorted(tag_index))}
+        # 열 단위로 꺼내 더하므로 열 우선(Fortran) 배치
+        self.matrix = np.zeros((n_games, len(self.vocab)), dtype=np.uint8, order='F')
+        for tag, col in self.vocab.items():
+            self.matrix[tag_index[tag], col] = 1
+
+    @classmethod
+    def from_tag_lists(cls, tag_lists: Iterable[Sequence[str]]) -> 'RecommendEngine':
+        tag_lists = list(tag_lists)
+        return cls(len(tag_lists), build_tag_index(tag_lists))
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def scores(self, answers: Sequence[str]) -> np.ndarray:
+        """각 게임의 태그 일치 개수 (답변 중복은 원래 로직처럼 중복 계산)."""
+        cols = [self.vocab[a] for a in answers if a in self.vocab]
+        if not cols:
+            return np.zeros(len(self), dtype=np.int16)
+        return self.matrix[:, cols].sum(axis=1, dtype=np.int16)
+
+    def top_k(self, answers: Sequence[str], k: int = 1,
+              rng: Optional[np.random.Generator] = None) -> List[Tuple[float, int]]:
+        """(점수, 게임 인덱스)를 점수 내림차순으로 최대 k개 반환합니다."""
+        n = len(self)
+        if n == 0 or k <= 0:
+            return []
+        rng = rng if rng is not None else np.random.default_rng()
+        scores = self.scores(answers) + rng.random(n)  # 랜덤 가중치
+        k = min(k, n)
+        if k < n:
+            idx = np.argpartition(-scores, k - 1)[:k]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-scores[idx])]
+        return [(float(scores[i]), int(i)) for i in idx]
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> Dict[str, int]:
+    """단어 경계를 공백으로 채운 문자 n-gram 빈도 (한국어는 음절 단위)."""
+    counts: Dict[str, int] = {}
+    lo, hi = ngram_range
+    for word in re.findall(r'\w+', text.lower()):
+        padded = f' {word} '
+        for n in range(lo, hi + 1):
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class TfidfIndex:
+    """설명 문장에 대한 문자 n-gram TF-IDF 희소 색인.
+
+    행렬은 n-gram(열) 우선 압축 형식(indptr/indices/data)으로 저장하므로, 질의에 등장한
+    n-gram의 열만 읽어 희소 내적을 계산합니다. 각 문서 벡터는 L2 정규화되어 내적 = 코사인 유사도.
+    """
+
+    def __init__(self, texts: Iterable[str], ngram_range: Tuple[int, int] = (2, 3)):
+        self.ngram_range = ngram_range
+        self.vocab: Dict[str, int] = {}
+        terms: List[int] = []
+        docs: List[int] = []
+        weights: List[float] = []
+        n_docs = 0
+        for doc, text in enumerate(texts):
+            n_docs += 1
+            counts = char_ngrams(text or "", ngram_range)
+            for gram, tf in counts.items():
+                terms.append(self.vocab.setdefault(gram, len(self.vocab)))
+                docs.append(doc)
+                weights.append(1.0 + math.log(tf))  # 로그 스케일 tf
+        self.n_docs = n_docs
+        terms_arr = np.asarray(terms, dtype=np.int32)
+        docs_arr = np.asarray(docs, dtype=np.int32)
+        data = np.asarray(weights, dtype=np.float32)
+
+        df = np.bincount(terms_arr, minlength=len(self.vocab))
+        self.idf = (np.log((1 + n_docs) / (1 + df)) + 1.0).astype(np.float32)
+        data *= self.idf[terms_arr]
+        norms = np.sqrt(np.bincount(docs_arr, weights=data.astype(np.float64) ** 2, minlength=n_docs))
+        data /= np.where(norms > 0, norms, 1.0)[docs_arr].astype(np.float32)
+
+        order = np.argsort(terms_arr, kind='stable')
+        self.indices = docs_arr[order]
+        self.data = data[order]
+        self.indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+
+    def vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """질의 문장의 (n-gram 번호, L2 정규화된 가중치). 색인에 없는 n-gram은 무시."""
+        ids, weights = [], []
+        for gram, tf in char_ngrams(text or "", self.ngram_range).items():
+            term = self.vocab.get(gram)
+            if term is not None:
+                ids.append(term)
+                weights.append((1.0 + math.log(tf)) * self.idf[term])
+        weights = np.asarray(weights, dtype=np.float32)
+        norm = np.linalg.norm(weights)
+        return np.asarray(ids, dtype=np.int64), (weights / norm if norm > 0 else weights)
+
+    def similarities(self, text: str) -> np.ndarray:
+        """모든 문서와의 코사인 유사도 (희소 내적)."""
+        ids, weights = self.vectorize(text)
+        if len(ids) == 0:
+            return np.zeros(self.n_docs, dtype=np.float32)
+        starts, ends = self.indptr[ids], self.indptr[ids + 1]
+        lengths = ends - starts
+        # 질의 n-gram 열들의 (문서, 가중치)를 한 번에 모아 bincount로 합산
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        contrib = self.data[positions] * np.repeat(weights, lengths)
+        return np.bincount(self.indices[positions], weights=contrib, minlength=self.n_docs)
+
+    def query(self, text: str, k: int = 5, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """(유사도, 문서 번호)를 유사도 내림차순으로 최대 k개. 유사도 0인 문서는 제외."""
+        sims = self.similarities(text)
+        if exclude is not None:
+            sims[exclude] = -1.0
+        k = min(k, self.n_docs)
+        if k <= 0:
+            return []
+        idx = np.argpartition(-sims, k - 1)[:k] if k < self.n_docs else np.arange(self.n_docs)
+        idx = idx[np.argsort(-sims[idx])]
+        return [(float(sims[i]), int(i)) for i in idx if sims[i] > 0]
@@ -0,0 +1,105 @@
+"""
+geo_index.py
+
+geopark.py의 "주변 검색"에 쓰는 위경도 격자 공간 인덱스 (Streamlit 비의존)
+- 지구 전체를 데이터 밀도에 맞춘 크기의 격자로 나누고 (행, 열) 키로 정렬해 둡니다.
+- 반경 검색은 원을 덮는 셀의 후보만 haversine 거리로 거르고, k-최근접은 반경을 넓혀 가며 찾습니다.
+- 경도 ±180° 경계와 극 근처도 처리합니다.
+- 의존성: numpy
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+GEO_POINTS_PER_CELL = 8  # 셀당 평균 지점 수 목표
+MIN_CELL_DEG = 0.001  # 약 100m
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """대권 거리(km). 배열끼리 브로드캐스트됩니다."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoIndex:
+    """위경도 격자(지오해시와 같은 원리) 인덱스.
+
+    지구 전체를 cell도 크기의 격자로 나누고 (행, 열) 키로 정렬해 두어, 한 격자 행의 열 구간이
+    searchsorted 두 번으로 연속 구간이 됩니다. 후보는 haversine 거리로 정확히 거릅니다.
+    경도 ±180° 경계도 처리합니다. 결과는 인덱스를 만든 DataFrame의 위치(행 번호)입니다.
+    """
+
+    def __init__(self, lat, lon):
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        rows = np.flatnonzero(valid)
+        lat, lon = lat[valid], (lon[valid] + 180) % 360 - 180
+        # 데이터가 퍼진 면적에 맞춰 셀 크기 결정
+        area = 1.0
+        if len(lat):
+            area = max((lat.max() - lat.min()) * (lon.max() - lon.min()), MIN_CELL_DEG ** 2)
+        self.cell = max(MIN_CELL_DEG, float(np.sqrt(area * GEO_POINTS_PER_CELL / max(len(lat), 1))))
+        self.ncols = int(np.ceil(360 / self.cell))
+        self.nrows = int(np.ceil(180 / self.cell))
+        key = self._row(lat) * self.ncols + self._col(lon)
+        order = np.argsort(key, kind='stable')
+        self.keys, self.rows = key[order], rows[order]
+        self.lat, self.lon = lat[order], lon[order]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell).astype(np.int64), 0, self.nrows - 1)
+
+    def _col(self, lon):
+        lon = (np.asarray(lon, dtype=float) + 180) % 360
+        return np.minimum(np.floor(lon / self.cell).astype(np.int64), self.ncols - 1)
+
+    def _candidates(self, lat, lon, radius_km):
+        """반경 원을 덮는 격자 셀들에 든 지점의 정렬 배열 위치."""
+        dlat = radius_km / KM_PER_DEG
+        lat0, lat1 = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        r0, r1 = int(self._row(lat0)), int(self._row(lat1))
+        coslat = np.cos(np.radians(max(abs(lat0), abs(lat1))))
+        if lat0 <= -90 or lat1 >= 90 or coslat * 180 <= dlat:
+            col_ranges = [(0, self.ncols - 1)]  # 극점을 포함하거나 경도 전체를 덮음
+        else:
+            dlon = dlat / coslat
+            c0, c1 = int(self._col(lon - dlon)), int(self._col(lon + dlon))
+            col_ranges = [(c0, c1)] if c0 <= c1 else [(c0, self.ncols - 1), (0, c1)]
+        row_base = np.arange(r0, r1 + 1, dtype=np.int64) * self.ncols
+        lo = np.concatenate([row_base + c0 for c0, _ in col_ranges])
+        hi = np.concatenate([row_base + c1 + 1 for _, c1 in col_ranges])
+        starts = np.searchsorted(self.keys, lo)
+        ends = np.searchsorted(self.keys, hi)
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])
+
+    def radius(self, lat, lon, radius_km):
+        """(rows, 거리 km) — 반경 안의 지점, 가까운 순."""
+        pos = self._candidates(lat, lon, radius_km)
+        d = haversine_km(lat, lon, self.lat[pos], self.lon[pos])
+        inside = d <= radius_km
+        pos, d = pos[inside], d[inside]
+        order = np.argsort(d, kind='stable')
+        return self.rows[pos[order]], d[order]
+
+    def nearest(self, lat, lon, k):
+        """(rows, 거리 km) — 가장 가까운 k개, 가까운 순.
+
+        셀 밀도로 반경을 추정한 뒤 k개가 찾아질 때까지 두 배씩 넓힙니다 (반경 검색은 정확하므로
+        그 안의 상위 k개가 곧 전체의 상위 k개입니다).
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius_km = self.cell * KM_PER_DEG * max(1.0, np.sqrt(k / GEO_POINTS_PER_CELL))
+        while True:
+            rows, d = self.radius(lat, lon, radius_km)
+            if len(rows) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                return rows[:k], d[:k]
+            radius_km *= 2
@@ -0,0 +1,273 @@
+"""
+geo_search.py
+
+geopark.py 목록 패널의 이름/설명 검색 색인 (Streamlit 비의존)
+- 이름과 설명의 글자 유니그램/바이그램 → 문서 번호 역색인을 NumPy 배열로 한 번 만듭니다.
+- 한글은 음절 그대로, 입력 중인 마지막 글자는 자모 접두어로, 자음만 입력하면 초성으로 찾습니다.
+- 결과는 점수순 문서 번호 배열이고, 최근 검색어 결과는 색인마다 LRU로 기억합니다.
+- 의존성: numpy
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_JONGSEONG = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+              'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+# 겹자모는 입력 도중 상태와 맞추기 위해 낱자로 나눔 (예: 'ㄺ' -> 'ㄹㄱ', 'ㅘ' -> 'ㅗㅏ')
+_SPLIT_JAMO = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ', 'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ',
+    'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+_HANGUL_FIRST, _HANGUL_COUNT = 0xAC00, 11172
+
+
+def _hangul_tables():
+    """str.translate용 (음절 → 낱자 자모, 음절 → 초성, 첫가끝 자모 → 호환 자모) 표.
+    음절 11,172개짜리라 모듈을 처음 import할 때 프로세스당 한 번만 만듦.
+    """
+    jamo = {ord(k): v for k, v in _SPLIT_JAMO.items()}
+    jamo.update({
+        _HANGUL_FIRST + i: ''.join(_SPLIT_JAMO.get(j, j) for j in (
+            _CHOSEONG[i // 588], _JUNGSEONG[i % 588 // 28], _JONGSEONG[i % 28]))
+        for i in range(_HANGUL_COUNT)
+    })
+    choseong = {_HANGUL_FIRST + i: _CHOSEONG[i // 588] for i in range(_HANGUL_COUNT)}
+    # NFKC는 호환 자모('ㄹ')를 첫가끝 자모로 바꾸므로 검색용으로 되돌림
+    compat = {0x1100 + i: c for i, c in enumerate(_CHOSEONG)}
+    compat.update({0x1161 + i: c for i, c in enumerate(_JUNGSEONG)})
+    compat.update({0x11A8 + i: c for i, c in enumerate(_JONGSEONG[1:])})
+    return jamo, choseong, compat
+
+
+_JAMO_TABLE, _CHOSEONG_TABLE, _COMPAT_TABLE = _hangul_tables()
+_GRAM_BITS = 21  # 유니코드 코드 포인트 비트 수 — 바이그램 = (앞 글자 << 21) | 뒷 글자
+SEARCH_CACHE_SIZE = 64  # 색인별로 기억해 둘 최근 검색어 수
+
+
+
+def normalize_texts(texts) -> List[str]:
+    """검색용 정규화 (geopark.py의 `normalize_query`와 같되 자모는 호환 자모로). 한 번에 이어 붙여 처리해 빠름."""
+    texts = [str(t) for t in texts]
+    if not texts:
+        return []
+    joined = unicodedata.normalize('NFKC', '\x00'.join(texts)).lower().translate(_COMPAT_TABLE)
+    return [t.strip() for t in re.sub(r'\s+', ' ', joined).split('\x00')]
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 호환 자모 낱자로 풀어 씀 ('한라' -> 'ㅎㅏㄴㄹㅏ'). 그 밖의 글자는 그대로."""
+    return text.translate(_JAMO_TABLE)
+
+
+def to_choseong(text: str) -> str:
+    """한글 음절을 초성으로 바꿈 ('제주도' -> 'ㅈㅈㄷ')."""
+    return text.translate(_CHOSEONG_TABLE)
+
+
+def _is_hangul(char: str) -> bool:
+    """완성형 음절 또는 호환 자모."""
+    return _HANGUL_FIRST <= ord(char) < _HANGUL_FIRST + _HANGUL_COUNT or 'ㄱ' <= char <= 'ㅣ'
+
+
+def _is_choseong_query(word: str) -> bool:
+    return len(word) >= 2 and all(c in _CHOSEONG for c in word)
+
+
+def _union(arrays, n: int) -> np.ndarray:
+    """정렬된 문서 번호 배열들의 합집합 (비트마스크 — 해시/정렬 없이 O(n))."""
+    mask = np.zeros(n, dtype=bool)
+    for arr in arrays:
+        mask[arr] = True
+    return np.flatnonzero(mask)
+
+
+def _member(docs, subset, n: int) -> np.ndarray:
+    """docs의 각 원소가 subset에 있는지 (불리언 배열)."""
+    mask = np.zeros(n, dtype=bool)
+    mask[subset] = True
+    return mask[docs]
+
+
+class TextField:
+    """정규화된 문자열 목록과 그 글자 유니그램/바이그램 → 문서 번호 역색인 (공백에서 끊김).
+
+    n-gram을 정수 코드로 만들어 numpy로 한 번에 정렬/중복 제거하므로 수십만 행도 빠르게 만듭니다.
+    `vocab`은 정렬된 코드, 각 코드의 문서 목록은 `postings[indptr[i]:indptr[i + 1]]` (오름차순).
+    바이그램 코드는 앞 글자 순으로 정렬되므로 같은 글자로 시작하는 바이그램은 연속 구간입니다.
+    후보가 많으면 문서마다 확인하는 대신 이어 붙인 전체 문자열을 정규식으로 한 번 훑습니다.
+    """
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.joined = '\x00'.join(texts)
+        self.offsets = np.cumsum([0] + [len(t) + 1 for t in texts])
+        cp = np.frombuffer(self.joined.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        doc = np.cumsum(cp == 0)
+        inside = ~np.isin(cp, [0, 9, 10, 13, 32])
+        pair = inside[:-1] & inside[1:]
+        grams = np.concatenate([cp[inside], (cp[:-1][pair] << _GRAM_BITS) | cp[1:][pair]])
+        docs = np.concatenate([doc[inside], doc[:-1][pair]])
+        order = np.lexsort((docs, grams))
+        grams, docs = grams[order], docs[order]
+        keep = np.ones(len(grams), dtype=bool)
+        keep[1:] = (grams[1:] != grams[:-1]) | (docs[1:] != docs[:-1])
+        grams, self.postings = grams[keep], docs[keep].astype(np.int32)
+        self.vocab, starts = np.unique(grams, return_index=True)
+        self.indptr = np.append(starts, len(grams))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _lookup(self, code: int) -> np.ndarray:
+        i = np.searchsorted(self.vocab, code)
+        if i < len(self.vocab) and self.vocab[i] == code:
+            return self.postings[self.indptr[i]:self.indptr[i + 1]]
+        return np.empty(0, dtype=np.int32)
+
+    def docs_with(self, word: str) -> np.ndarray:
+        """word(공백 없음)의 모든 유니그램/바이그램을 포함하는 문서 — 세 글자 이상이면 후보일 뿐."""
+        codes = [ord(c) for c in word] if len(word) == 1 else [
+            (ord(a) << _GRAM_BITS) | ord(b) for a, b in zip(word, word[1:])]
+        lists = sorted((self._lookup(c) for c in set(codes)), key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            if not len(result):
+                break
+            result = result[_member(result, other, len(self))]
+        return result
+
+    def docs_with_any(self, codes) -> np.ndarray:
+        return _union([self._lookup(c) for c in codes], len(self))
+
+    def chars(self, after: Optional[str] = None) -> List[str]:
+        """색인에 있는 글자 — after가 있으면 그 글자 바로 뒤에 나온 글자들."""
+        if after is None:
+            lo, hi = 0, 1 << _GRAM_BITS
+        else:
+            lo, hi = ord(after) << _GRAM_BITS, (ord(after) + 1) << _GRAM_BITS
+        a, b = np.searchsorted(self.vocab, [lo, hi])
+        return [chr(c & ((1 << _GRAM_BITS) - 1)) for c in self.vocab[a:b]]
+
+    def verify(self, docs: np.ndarray, pattern: str, at_start: bool = False) -> np.ndarray:
+        """docs 중 문자열이 정규식 pattern을 포함하는(at_start면 그것으로 시작하는) 문서."""
+        if not len(docs):
+            return docs
+        if len(docs) * 8 < len(self):
+            regex = re.compile(pattern)
+            test = regex.match if at_start else regex.search
+            return docs[np.fromiter((test(self.texts[i]) is not None for i in docs), dtype=bool, count=len(docs))]
+        regex = re.compile(('(?:^|(?<=\x00))' if at_start else '') + pattern)
+        hits = np.fromiter((m.start() for m in regex.finditer(self.joined)), dtype=np.int64)
+        owners = np.searchsorted(self.offsets, hits, side='right') - 1
+        return docs[_member(docs, owners, len(self))]
+
+
+class SearchIndex:
+    """지질공원 이름/설명 검색 색인. 데이터셋마다 한 번 만들고, 검색은 역색인의 후보만 봅니다.
+
+    - 공백으로 나눈 모든 검색어가 이름이나 설명에 있어야 함 (AND).
+    - 마지막 검색어의 마지막 글자는 입력 중일 수 있으므로 자모 접두어로 맞춤
+      ('한ㄹ', '한' -> '한라산', 'ㅈ' -> 'ㅈ'으로 시작하는 음절).
+    - 자음만 두 글자 이상이면 이름의 초성으로 검색 ('ㅈㅈㄷ' -> '제주도').
+    - 점수: 이름 일치 3점, 설명에만 일치 1점, 초성 일치 2점, 이름이 그 말로 시작하면 +1.
+      같은 점수면 짧은 이름, 그다음 원래 순서.
+    두 글자 이하의 검색어는 유니그램/바이그램 색인만으로 정확하므로 문자열을 확인하지 않습니다.
+    """
+
+    def __init__(self, names, descriptions):
+        names = normalize_texts(names)
+        self.name = TextField(names)
+        self.description = TextField(normalize_texts(descriptions))
+        self.choseong = TextField(to_choseong('\x00'.join(names)).split('\x00') if names else [])
+        # 이름 첫 글자 / 첫 바이그램 코드 (접두어 가산점을 벡터로 계산)
+        self.head1 = np.fromiter((ord(n[0]) if n else 0 for n in names), dtype=np.int64, count=len(names))
+        self.head2 = np.fromiter(((ord(n[0]) << _GRAM_BITS) | ord(n[1]) if len(n) > 1 else 0 for n in names),
+                                 dtype=np.int64, count=len(names))
+        self.name_lengths = np.fromiter((len(n) for n in names), dtype=np.int64, count=len(names))
+        self.search = lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+
+    def __len__(self):
+        return len(self.name)
+
+    @staticmethod
+    def _exact(field: TextField, word: str) -> np.ndarray:
+        docs = field.docs_with(word)
+        return field.verify(docs, re.escape(word)) if len(word) > 2 else docs
+
+    @staticmethod
+    def _with_tail(field: TextField, prefix: str, chars, pattern: str) -> np.ndarray:
+        """prefix 바로 뒤에 chars 중 한 글자가 오는 문서."""
+        if not prefix:
+            return field.docs_with_any([ord(c) for c in chars])
+        docs = field.docs_with_any([(ord(prefix[-1]) << _GRAM_BITS) | ord(c) for c in chars])
+        if len(prefix) > 1:
+            docs = docs[_member(docs, field.docs_with(prefix), len(field))]
+            docs = field.verify(docs, pattern)
+        return docs
+
+    def _name_prefix(self, docs, word: str, codes1=None, codes2=None, pattern=None) -> np.ndarray:
+        """docs 중 이름이 word(또는 자모 패턴)로 시작하는 문서."""
+        if codes1 is not None:
+            return docs[np.isin(self.head1[docs], codes1)]
+        if codes2 is not None:
+            return docs[np.isin(self.head2[docs], codes2)]
+        docs = docs[self.head1[docs] == ord(word[0])]
+        if len(word) > 1:
+            docs = docs[self.head2[docs] == ((ord(word[0]) << _GRAM_BITS) | ord(word[1]))]
+        if len(word) > 2 or pattern is not None:
+            docs = self.name.verify(docs, pattern or re.escape(word), at_start=True)
+        return docs
+
+    def _match_word(self, word: str, fuzzy_tail: bool):
+        """(이름 일치, 설명 일치, 이름 접두어 일치) 문서 번호 배열과 이름 일치 점수."""
+        if _is_choseong_query(word):
+            in_name = self._exact(self.choseong, word)
+            return in_name, np.empty(0, dtype=np.int32), self.choseong.verify(in_name, word, at_start=True), 2
+        if not (fuzzy_tail and _is_hangul(word[-1])):
+            in_name = self._exact(self.name, word)
+            return in_name, self._exact(self.description, word), self._name_prefix(in_name, word), 3
+        prefix, tail_jamo = word[:-1], to_jamo(word[-1])
+        after = prefix[-1] if prefix else None
+        chars = sorted(c for c in set(self.name.chars(after)) | set(self.description.chars(after))
+                       if to_jamo(c).startswith(tail_jamo))
+        if not chars:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, empty, 3
+        pattern = re.escape(prefix) + '[' + ''.join(re.escape(c) for c in chars) + ']'
+        in_name = self._with_tail(self.name, prefix, chars, pattern)
+        in_description = self._with_tail(self.description, prefix, chars, pattern)
+        if not prefix:
+            starts = self._name_prefix(in_name, word, codes1=[ord(c) for c in chars])
+        elif len(prefix) == 1:
+            starts = self._name_prefix(in_name, word, codes2=[(ord(prefix) << _GRAM_BITS) | ord(c) for c in chars])
+        else:
+            starts = self._name_prefix(in_name, prefix, pattern=pattern)
+        return in_name, in_description, starts, 3
+
+    def _search(self, query: str) -> np.ndarray:
+        """검색어에 맞는 문서 번호를 점수순으로 (호출자는 결과 배열을 수정하지 말 것)."""
+        words = normalize_texts([query])[0].split()
+        n = len(self)
+        if not words:
+            return np.arange(n)
+        docs, scores = None, None
+        for i, word in enumerate(words):
+            in_name, in_description, starts, name_score = self._match_word(word, fuzzy_tail=i == len(words) - 1)
+            matched = _union([in_name, in_description], n)
+            if docs is not None:
+                keep = _member(docs, matched, n)
+                docs, scores = docs[keep], scores[keep]
+                matched = docs
+            word_scores = np.where(_member(matched, in_name, n), name_score, 1) + _member(matched, starts, n)
+            docs, scores = matched, word_scores if scores is None else scores + word_scores
+            if not len(docs):
+                break
+        order = np.lexsort((docs, self.name_lengths[docs], -scores))
+        return docs[order].astype(np.int64)
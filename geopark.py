@@ -5,7 +5,10 @@ streamlit_korea_geoparks.py
 - 의존성 최소화: `geopy`를 사용하지 않도록 변경했습니다. 대신 Nominatim(오픈스트리트맵) HTTP API를 `requests`로 호출합니다(옵션).
 - `requests`가 설치되어 있지 않으면 지오코딩 기능은 비활성화되고, 사용자는 좌표가 포함된 CSV 업로드를 권장합니다.
 - pydeck이 없으면 Streamlit의 `st.map`으로 대체 표시합니다.
-- Nominatim 호출은 캐시(`st.cache_data`)되고 호출 간 1초 대기하여 차단을 줄입니다.
+- 지오코딩은 백그라운드 작업자가 처리하며(중복 제거, 토큰 버킷 속도 제한, 재시도) 좌표가 도착하는 대로
+  지도에 표시됩니다. 백엔드는 Nominatim 호환 서버(GEOCODER_URL) 또는 오프라인 지명 사전(GAZETTEER_PATH)입니다.
+- 지오코딩 결과는 SQLite 파일(정규화된 검색어 기준)에 저장되어 재시작/재배포 후에도 유지되며,
+  CSV 파일로 미리 채워 둘 수 있습니다. 속도 제한은 실제로 요청할 때만 적용됩니다.
 
 사용법:
     pip install streamlit pandas requests pydeck
@@ -14,31 +17,51 @@ streamlit_korea_geoparks.py
 파일에는 예제 CSV 다운로드 버튼 및 현재 데이터 다운로드 버튼이 포함되어 있습니다.
 """
 
-from functools import lru_cache
+import hashlib
 import io
 import json
+import queue
+import re
+import sqlite3
+import threading
 import time
 import os
-from typing import Tuple, Optional
+import unicodedata
+from typing import Optional, Tuple
 
+import numpy as np
 import streamlit as st
 import pandas as pd
 
-# Optional external libs
-try:
-    import requests
-except Exception:
-    requests = None
+import perf
+from geo_index import KM_PER_DEG, GeoIndex
+from geo_search import SearchIndex
+
+# Optional external libs — 처음 쓰는 코드 경로에서 프로세스당 한 번만 import (첫 화면이 빨리 뜨도록)
+@perf.cache_resource
+def load_requests():
+    """Nominatim 백엔드를 처음 만들 때 import. 없으면 None."""
+    try:
+        import requests
+    except Exception:
+        return None
+    return requests
+
+
+@perf.cache_resource
+def load_pydeck():
+    """지도를 처음 그릴 때 import. 없으면 None (st.map으로 대체)."""
+    try:
+        import pydeck
+    except Exception:
+        return None
+    return pydeck
 
-try:
-    import pydeck as pdk
-    _HAS_PYDECK = True
-except Exception:
-    _HAS_PYDECK = False
 
 # ----------------------
 # 기본 설정
 # ----------------------
+perf.start_run('geopark')
 st.set_page_config(page_title="국가지질공원 지도", layout="wide")
 
 # 내장(예제) 지질공원 목록 — 이름과 간단한 설명
@@ -52,29 +75,148 @@ BUILTIN_GEOPARKS = [
     {"name": "무등산권 국가지질공원", "description": "기암괴석과 암석학적 가치"},
 ]
 
+# 지오코딩 영구 캐시 (환경 변수로 경로 변경 가능)
+GEOCODE_DB_PATH = os.environ.get('GEOCODE_DB_PATH', '.geocode_cache.sqlite3')
+GEOCODE_SEED_PATH = os.environ.get('GEOCODE_SEED_PATH')  # 시작 시 읽어 둘 시드 CSV (선택)
+
+# 지오코딩 백엔드: 'nominatim'(기본, GEOCODER_URL로 로컬 대체 서버 지정 가능) 또는 'gazetteer'(오프라인 CSV)
+GEOCODER = os.environ.get('GEOCODER', 'nominatim')
+GEOCODER_URL = os.environ.get('GEOCODER_URL', 'https://nominatim.openstreetmap.org')
+GEOCODER_RATE = float(os.environ.get('GEOCODER_RATE', '1'))  # Nominatim 사용 정책: 초당 1회 이하
+GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH')
+GEOCODE_RETRIES = 3
+GEOCODE_BACKOFF = 1.0  # 초, 재시도마다 두 배
+GEOCODE_POLL_SECONDS = 1.0  # 진행 중일 때 화면 갱신 간격
+
 # ----------------------
-# 유틸리티: Nominatim 지오코딩 (requests 사용)
+# 유틸리티: 지오코딩 캐시
 # ----------------------
-@st.cache_data
-def _geocode_with_nominatim(query: str) -> Tuple[Optional[float], Optional[float]]:
-    """Nominatim HTTP API로 지오코딩. 실패하면 (None, None).
+def normalize_query(query: str) -> str:
+    """캐시 키용 검색어 정규화 (유니코드 NFKC, 소문자, 공백 정리)."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', str(query))).strip().lower()
+
 
-    주의: 호출량이 많으면 차단될 수 있으니 앱에서 최소한의 호출만 하세요.
+def read_coordinate_rows(file):
+    """이름/위도/경도 CSV를 (name, lat, lon) 목록으로 읽음 (시드 CSV, 지명 사전 공용)."""
+    table = pd.read_csv(file)
+    colmap = {c.lower(): c for c in table.columns}
+    name_col = colmap.get('query') or colmap.get('name') or colmap.get('지역') or colmap.get('지질공원명')
+    lat_col = colmap.get('latitude') or colmap.get('lat') or colmap.get('위도')
+    lon_col = colmap.get('longitude') or colmap.get('lon') or colmap.get('경도')
+    if not (name_col and lat_col and lon_col):
+        raise ValueError("CSV에는 이름/위도/경도 컬럼이 필요합니다.")
+    lats = pd.to_numeric(table[lat_col], errors='coerce')
+    lons = pd.to_numeric(table[lon_col], errors='coerce')
+    ok = lats.notna() & lons.notna()
+    return list(zip(table.loc[ok, name_col].astype(str), lats[ok].astype(float), lons[ok].astype(float)))
+
+
+class GeocodeStore:
+    """정규화된 검색어 → 좌표를 저장하는 SQLite 캐시.
+
+    결과가 없었던 검색어도 (NULL, NULL)로 저장해 다시 요청하지 않습니다.
+    네트워크 오류는 저장하지 않습니다.
     """
-    if requests is None:
-        return None, None
-
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": f"{query}, South Korea",
-        "format": "json",
-        "limit": 1,
-        "addressdetails": 0,
-    }
-    headers = {"User-Agent": "KoreaGeoparksApp/1.0 (+contact@example.com)"}
 
-    try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS geocode ('
+                ' query TEXT PRIMARY KEY,'
+                ' latitude REAL,'
+                ' longitude REAL,'
+                ' source TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+
+    def get(self, query: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """저장된 (lat, lon). 저장된 적 없는 검색어면 None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT latitude, longitude FROM geocode WHERE query = ?', (normalize_query(query),)
+            ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def put(self, query: str, lat: Optional[float], lon: Optional[float], source: str):
+        self.put_many([(query, lat, lon)], source)
+
+    def put_many(self, rows, source: str) -> int:
+        now = time.time()
+        records = [(normalize_query(q), lat, lon, source, now) for q, lat, lon in rows]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO geocode (query, latitude, longitude, source, updated_at)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                records,
+            )
+            self._conn.commit()
+        return len(records)
+
+    def seed_from_csv(self, file) -> int:
+        """name(또는 query/지역/지질공원명), latitude/lat/위도, longitude/lon/경도 컬럼의 CSV로 채움."""
+        return self.put_many(read_coordinate_rows(file), 'seed')
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM geocode').fetchone()[0]
+
+
+class TokenBucket:
+    """토큰 버킷 속도 제한기 (초당 rate개, 최대 capacity개까지 몰아서 허용)."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+# ----------------------
+# 지오코딩 백엔드 (교체 가능)
+# ----------------------
+class NominatimBackend:
+    """Nominatim 호환 HTTP API. 공개 서버 또는 같은 API를 흉내 내는 로컬 서버를 가리킬 수 있습니다."""
+
+    name = 'nominatim'
+    persist = True  # 결과를 영구 캐시에 저장
+
+    def __init__(self, base_url: str, rate: float):
+        self.base_url = base_url.rstrip('/')
+        self.rate = rate
+        requests = load_requests()
+        self.session = perf.instrument_session(requests.Session()) if requests is not None else None
+
+    @property
+    def available(self) -> bool:
+        return self.session is not None
+
+    def geocode(self, query: str) -> Tuple[Optional[float], Optional[float]]:
+        """결과가 없으면 (None, None), 요청 실패는 예외."""
+        params = {
+            "q": f"{query}, South Korea",
+            "format": "json",
+            "limit": 1,
+            "addressdetails": 0,
+        }
+        headers = {"User-Agent": "KoreaGeoparksApp/1.0 (+contact@example.com)"}
+
+        resp = self.session.get(f"{self.base_url}/search", params=params, headers=headers, timeout=10)
         resp.raise_for_status()
         data = resp.json()
         if not data:
@@ -82,8 +224,244 @@ def _geocode_with_nominatim(query: str) -> Tuple[Optional[float], Optional[float
         lat = float(data[0]["lat"])
         lon = float(data[0]["lon"])
         return lat, lon
-    except Exception:
-        return None, None
+
+
+class GazetteerBackend:
+    """오프라인 지명 사전(CSV: name, latitude, longitude). 네트워크 없이 동작합니다."""
+
+    name = 'gazetteer'
+    persist = False  # 파일 자체가 캐시이므로 다시 저장하지 않음
+    rate = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table = {normalize_query(q): (lat, lon) for q, lat, lon in read_coordinate_rows(path)}
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def geocode(self, query: str) -> Tuple[Optional[float], Optional[float]]:
+        return self._table.get(normalize_query(query), (None, None))
+
+
+def make_backend(kind: str):
+    if kind == 'gazetteer':
+        return GazetteerBackend(GAZETTEER_PATH)
+    return NominatimBackend(GEOCODER_URL, GEOCODER_RATE)
+
+
+# ----------------------
+# 백그라운드 지오코딩 작업자
+# ----------------------
+class GeocodeJob:
+    """한 데이터셋의 지오코딩 진행 상황. 작업자 스레드가 결과를 채워 넣습니다."""
+
+    def __init__(self, keys):
+        self._lock = threading.Lock()
+        self.total = len(keys)
+        self.results = {}   # 정규화된 검색어 -> (lat, lon)
+        self.failed = set()  # 재시도 후에도 실패한 검색어 (캐시되지 않음)
+
+    def _finish(self, key: str, coords: Optional[Tuple[Optional[float], Optional[float]]]):
+        with self._lock:
+            if coords is None:
+                self.failed.add(key)
+            else:
+                self.results[key] = coords
+
+    @property
+    def done(self) -> int:
+        with self._lock:
+            return len(self.results) + len(self.failed)
+
+    @property
+    def finished(self) -> bool:
+        return self.done >= self.total
+
+    def coords(self, query: str) -> Tuple[Optional[float], Optional[float]]:
+        with self._lock:
+            return self.results.get(normalize_query(query), (None, None))
+
+
+class GeocodeWorker:
+    """요청 큐를 처리하는 데몬 스레드.
+
+    - 같은 검색어는 배치 안에서, 그리고 진행 중인 다른 작업과도 한 번만 요청합니다.
+    - 실제 요청 앞에서만 토큰 버킷으로 속도를 제한합니다.
+    - 실패하면 지수 백오프로 재시도합니다.
+    """
+
+    def __init__(self, backend, store: GeocodeStore, retries: int = GEOCODE_RETRIES,
+                 backoff: float = GEOCODE_BACKOFF):
+        self.backend = backend
+        self.store = store
+        self.retries = retries
+        self.backoff = backoff
+        self._bucket = TokenBucket(backend.rate) if backend.rate else None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = {}  # 정규화된 검색어 -> 결과를 기다리는 작업 목록
+        threading.Thread(target=self._run, name=f'geocode-{backend.name}', daemon=True).start()
+
+    def submit(self, queries) -> GeocodeJob:
+        unique = {}
+        for q in queries:
+            unique.setdefault(normalize_query(q), q)
+        job = GeocodeJob(unique)
+        for key, q in unique.items():
+            cached = self.store.get(q)
+            if cached is not None:
+                job._finish(key, cached)
+                continue
+            with self._lock:
+                if key in self._waiting:
+                    self._waiting[key].append(job)
+                    continue
+                self._waiting[key] = [job]
+            self._queue.put((key, q))
+        return job
+
+    def _run(self):
+        while True:
+            key, q = self._queue.get()
+            try:
+                coords = self._resolve(q)
+            except Exception:
+                # 예상 못한 오류로 스레드가 죽으면 기다리는 작업이 영영 끝나지 않으므로 실패로 처리
+                coords = None
+            with self._lock:
+                jobs = self._waiting.pop(key, [])
+            for job in jobs:
+                job._finish(key, coords)
+
+    def _resolve(self, query: str):
+        if not self.backend.available:
+            return None
+        for attempt in range(self.retries):
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                lat, lon = self.backend.geocode(query)
+            except Exception:
+                # 네트워크 오류는 캐시하지 않고 백오프 후 재시도 (마지막 시도 뒤에는 기다리지 않음)
+                if attempt < self.retries - 1:
+                    time.sleep(self.backoff * (2 ** attempt))
+                continue
+            if self.backend.persist:
+                try:
+                    self.store.put(query, lat, lon, self.backend.name)
+                except Exception:
+                    # 캐시 저장 실패(예: database is locked)여도 받은 좌표는 이번 작업에 사용
+                    pass
+            return lat, lon
+        return None
+
+
+@perf.cache_resource
+def get_geocode_store() -> GeocodeStore:
+    store = GeocodeStore(GEOCODE_DB_PATH)
+    if GEOCODE_SEED_PATH and os.path.exists(GEOCODE_SEED_PATH):
+        store.seed_from_csv(GEOCODE_SEED_PATH)
+    return store
+
+
+@perf.cache_resource
+def get_geocode_worker(kind: str) -> GeocodeWorker:
+    """백엔드 종류별로 하나의 작업자를 모든 세션이 공유합니다."""
+    return GeocodeWorker(make_backend(kind), get_geocode_store())
+
+# ----------------------
+# 공간 인덱스: 반경 / k-최근접 검색
+# ----------------------
+NEAR_ANCHOR_OPTIONS = 1000  # '기준 지점' 목록에 올릴 지질공원 수
+
+
+def coordinates_digest(df: pd.DataFrame) -> str:
+    """좌표 배열의 해시 — 지오코딩으로 좌표가 바뀌면 인덱스도 새로 만듭니다."""
+    h = hashlib.sha1()
+    h.update(df['latitude'].to_numpy(dtype=float, na_value=np.nan).tobytes())
+    h.update(df['longitude'].to_numpy(dtype=float, na_value=np.nan).tobytes())
+    return h.hexdigest()
+
+
+@perf.cache_resource(max_entries=8)
+def build_geo_index(digest: str, _df: pd.DataFrame) -> GeoIndex:
+    """데이터셋(좌표 해시)마다 한 번만 만듭니다. `_df`는 해시하지 않고 digest로 대신합니다."""
+    return GeoIndex(_df['latitude'].to_numpy(dtype=float, na_value=np.nan),
+                    _df['longitude'].to_numpy(dtype=float, na_value=np.nan))
+
+# ----------------------
+# 검색 색인: 이름/설명 n-gram 역색인 (한글 음절, 자모, 초성 — geo_search.py)
+# ----------------------
+SEARCH_PAGE_SIZE = 20
+
+
+@perf.cache_resource(max_entries=8)
+def build_search_index(dataset_key: str, _df: pd.DataFrame) -> SearchIndex:
+    """데이터셋(업로드 파일)마다 한 번만 만듭니다. `_df`는 해시하지 않고 dataset_key로 대신합니다."""
+    return SearchIndex(_df['name'].astype(str).tolist(), _df['description'].fillna('').astype(str).tolist())
+
+# ----------------------
+# 지도: 확대 수준별 격자 클러스터
+# ----------------------
+# 웹 메르카토르 타일(256px) 기준. 확대 수준마다 CLUSTER_CELL_PX 크기의 격자로 지점을 묶고,
+# 전체 지점이 MAX_RAW_POINTS 이하이면 모두, 아니면 보이는 범위(여유 포함) 안의 지점이
+# MAX_RAW_POINTS 이하일 때 그 지점만 개별 지점으로 보냅니다.
+MAP_ZOOM_RANGE = (3, 15)
+DEFAULT_MAP_ZOOM = 6
+CLUSTER_CELL_PX = 60
+MAX_RAW_POINTS = 5_000
+MAP_VIEW_PX = (800, 500)  # 지도 화면 크기 추정 (보이는 범위 계산용)
+MAP_VIEW_MARGIN = 1.0  # 화면 크기의 몇 배만큼 주변도 함께 보낼지 (살짝 움직여도 비지 않게)
+MAP_COLUMNS = ['latitude', 'longitude', 'name', 'description']
+
+
+def degrees_per_pixel(zoom: float) -> float:
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def view_mask(lat, lon, center, zoom: float) -> np.ndarray:
+    """center/zoom 화면(여유 포함)에 드는 지점."""
+    scale = degrees_per_pixel(zoom) * (0.5 + MAP_VIEW_MARGIN)
+    half_lon = MAP_VIEW_PX[0] * scale
+    half_lat = MAP_VIEW_PX[1] * scale * np.cos(np.radians(center[0]))
+    return (np.abs(lat - center[0]) <= half_lat) & (np.abs((lon - center[1] + 180) % 360 - 180) <= half_lon)
+
+
+def cluster_cells(lat, lon, names, zoom: int) -> pd.DataFrame:
+    """zoom 단계의 격자 셀마다 무게중심 마커 하나 (count = 묶인 지점 수)."""
+    cell_lon = degrees_per_pixel(zoom) * CLUSTER_CELL_PX
+    cell_lat = cell_lon * np.cos(np.radians(np.median(lat))) if len(lat) else cell_lon
+    key = np.floor((lat + 90) / cell_lat).astype(np.int64) * (int(360 / cell_lon) + 1) \
+        + np.floor((lon + 180) / cell_lon).astype(np.int64)
+    order = np.argsort(key, kind='stable')
+    _, starts, counts = np.unique(key[order], return_index=True, return_counts=True)
+    cells = pd.DataFrame({
+        'latitude': np.add.reduceat(lat[order], starts) / counts,
+        'longitude': np.add.reduceat(lon[order], starts) / counts,
+        'count': counts,
+    })
+    # 툴팁: 셀에 든 지점 수와 앞의 몇 곳 이름
+    sorted_names = [names[i] for i in order]
+    cells['name'] = [f'{c}곳' if c > 1 else sorted_names[a] for a, c in zip(starts, counts)]
+    cells['description'] = [', '.join(sorted_names[a:a + 3]) + (' …' if c > 3 else '') if c > 1 else ''
+                            for a, c in zip(starts, counts)]
+    cells['radius'] = 6 + 3 * np.sqrt(counts)  # 픽셀
+    return cells
+
+
+@perf.cache_resource(max_entries=32)
+def build_cluster_level(digest: str, zoom: int, _frame: pd.DataFrame) -> pd.DataFrame:
+    """(좌표 해시, 확대 수준)마다 한 번만 계산합니다. 결과를 수정하지 마세요."""
+    return cluster_cells(_frame['latitude'].to_numpy(dtype=float), _frame['longitude'].to_numpy(dtype=float),
+                         _frame['name'].astype(str).tolist(), zoom)
+
+
+def choose_map_mode(mode: str, n_in_view: int) -> str:
+    if mode != '자동':
+        return mode
+    return '개별 지점' if n_in_view <= MAX_RAW_POINTS else '클러스터'
 
 # ----------------------
 # CSV 로드 및 데이터 준비
@@ -115,7 +493,7 @@ def load_user_csv(uploaded) -> pd.DataFrame:
 
 def build_dataframe(uploaded_file) -> pd.DataFrame:
     """업로드된 CSV가 있으면 로드, 없으면 내장 목록을 DataFrame으로 반환.
-    좌표가 없으면 requests가 설치된 경우 Nominatim을 통해 지오코딩합니다.
+    좌표가 없으면 빈 latitude/longitude 컬럼을 만들고 `geocoding` 속성을 True로 둡니다.
     """
     if uploaded_file is not None:
         df = load_user_csv(uploaded_file)
@@ -123,25 +501,10 @@ def build_dataframe(uploaded_file) -> pd.DataFrame:
         df = pd.DataFrame(BUILTIN_GEOPARKS)
 
     # 모든 행에 latitude, longitude 컬럼이 있는지 확인
-    if 'latitude' not in df.columns or 'longitude' not in df.columns:
-        # 지오코딩 가능 여부 확인
-        if requests is None:
-            # 지오코딩 불가 — 좌표가 없는 항목은 NaN으로 남겨둠
-            st.warning("지오코딩을 위해 `requests` 패키지가 필요합니다. 설치하려면 `pip install requests`를 실행하세요.\n또는 좌표(위도/경도)를 포함한 CSV를 업로드하세요.")
-            df['latitude'] = df.get('latitude', pd.NA)
-            df['longitude'] = df.get('longitude', pd.NA)
-        else:
-            lats = []
-            lons = []
-            with st.spinner("지오코딩 중입니다 — 한 번에 많은 요청을 보내면 차단될 수 있으니 기다려주세요..."):
-                for name in df['name'].astype(str):
-                    lat, lon = _geocode_with_nominatim(name)
-                    lats.append(lat)
-                    lons.append(lon)
-                    # Nominatim 사용 규칙에 맞춰 지연
-                    time.sleep(1)
-            df['latitude'] = lats
-            df['longitude'] = lons
+    df.attrs['geocoding'] = 'latitude' not in df.columns or 'longitude' not in df.columns
+    if df.attrs['geocoding']:
+        df['latitude'] = pd.NA
+        df['longitude'] = pd.NA
 
     # 위도/경도 타입 정리
     df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
@@ -149,9 +512,49 @@ def build_dataframe(uploaded_file) -> pd.DataFrame:
 
     return df
 
+
+@perf.cache_resource(max_entries=8)
+def load_dataset(dataset_key: str, _uploaded_file) -> pd.DataFrame:
+    """업로드 파일마다 한 번만 읽고 정리합니다. `_uploaded_file`은 해시하지 않고 dataset_key로 대신합니다.
+    세션끼리 공유하므로 수정하지 마세요.
+    """
+    return build_dataframe(_uploaded_file)
+
+
+def start_geocoding(df: pd.DataFrame, kind: str, dataset_key: str) -> GeocodeJob:
+    """세션당 데이터셋별로 한 번만 작업을 제출하고, 이후 재실행에서는 같은 작업을 재사용."""
+    signature = (kind, dataset_key)
+    if st.session_state.get('geocode_signature') != signature:
+        st.session_state['geocode_job'] = get_geocode_worker(kind).submit(df['name'].astype(str).tolist())
+        st.session_state['geocode_signature'] = signature
+    return st.session_state['geocode_job']
+
+
+def apply_geocoding(df: pd.DataFrame, job: GeocodeJob) -> pd.DataFrame:
+    """지금까지 도착한 좌표를 채운 사본을 반환 (나머지는 NaN)."""
+    coords = [job.coords(name) for name in df['name'].astype(str)]
+    df = df.copy()
+    df['latitude'] = pd.to_numeric(pd.Series([c[0] for c in coords], index=df.index, dtype=object), errors='coerce')
+    df['longitude'] = pd.to_numeric(pd.Series([c[1] for c in coords], index=df.index, dtype=object), errors='coerce')
+    return df
+
+
+@perf.cache_resource(max_entries=4)
+def prepare_points(dataset_key: str, progress, _df: pd.DataFrame, _job: Optional[GeocodeJob]):
+    """(좌표를 채운 df, 유효 좌표 마스크, 좌표가 있는 행, 각각의 좌표 해시) — 재실행마다 다시 만들지 않음.
+
+    progress는 지오코딩 작업과 완료 건수 (지오코딩이 없으면 None) — 새 좌표가 도착할 때만 다시 계산합니다.
+    세션끼리 공유하므로 수정하지 마세요.
+    """
+    df = apply_geocoding(_df, _job) if _job is not None else _df
+    valid = df['latitude'].notna() & df['longitude'].notna()
+    map_df = df[valid]
+    return df, valid, map_df, coordinates_digest(df), coordinates_digest(map_df)
+
 # ----------------------
 # Streamlit UI
 # ----------------------
+perf.mark('사이드바')
 st.sidebar.title("설정")
 st.sidebar.markdown("CSV(예: name,latitude,longitude,description) 업로드 또는 내장 목록 사용")
 uploaded_file = st.sidebar.file_uploader("지오파크 CSV 업로드", type=['csv'])
@@ -159,86 +562,225 @@ use_builtin = st.sidebar.checkbox('내장 목록 사용(CSV 업로드가 없을
 
 st.sidebar.markdown('---')
 st.sidebar.info('Nominatim 지오코딩은 공개 API입니다. 대량 호출 시 차단될 수 있으니 주의하세요.')
+backend_options = ['nominatim'] + (['gazetteer'] if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH) else [])
+geocoder_kind = st.sidebar.selectbox(
+    '지오코딩 백엔드', backend_options,
+    index=backend_options.index(GEOCODER) if GEOCODER in backend_options else 0,
+    help='gazetteer는 GAZETTEER_PATH의 오프라인 지명 사전, nominatim은 GEOCODER_URL의 서버를 사용합니다.',
+)
+seed_file = st.sidebar.file_uploader('지오코딩 캐시 시드 CSV (name, latitude, longitude)', type=['csv'])
+if seed_file is not None and st.session_state.get('geocode_seed_id') != seed_file.file_id:
+    try:
+        seeded = get_geocode_store().seed_from_csv(seed_file)
+        st.session_state['geocode_seed_id'] = seed_file.file_id
+        st.sidebar.success(f'지오코딩 캐시에 {seeded}개 좌표를 저장했습니다.')
+    except Exception as e:
+        st.sidebar.error(f'시드 CSV 처리 오류: {e}')
+st.sidebar.caption(f'지오코딩 캐시: {get_geocode_store().count()}개')
 
 if uploaded_file is None and not use_builtin:
     st.info('왼쪽에서 CSV 업로드 또는 "내장 목록 사용"을 체크하세요.')
     st.stop()
 
 # 데이터 준비
+perf.mark('데이터 로드')
+# 업로드 파일마다 바뀌는 키 — 읽은 데이터와 이름/설명 검색 색인은 이 키로 한 번만 만듦
+dataset_key = uploaded_file.file_id if uploaded_file is not None else 'builtin'
 try:
-    df = build_dataframe(uploaded_file if uploaded_file is not None else None)
+    df = load_dataset(dataset_key, uploaded_file)
 except Exception as e:
     st.error(f"데이터 로드/처리 오류: {e}")
     st.stop()
 
-# 유효한 좌표만 필터
-valid = df['latitude'].notna() & df['longitude'].notna()
+# 좌표가 없으면 백그라운드 작업자에게 맡기고, 도착한 좌표부터 그림
+perf.mark('지오코딩')
+geocode_job = None
+if df.attrs.get('geocoding'):
+    backend = get_geocode_worker(geocoder_kind).backend
+    if not backend.available:
+        # 지오코딩 불가 — 캐시에 없는 항목은 NaN으로 남겨둠
+        st.warning("지오코딩을 위해 `requests` 패키지가 필요합니다. 설치하려면 `pip install requests`를 실행하세요.\n또는 좌표(위도/경도)를 포함한 CSV를 업로드하세요.")
+    geocode_job = start_geocoding(df, geocoder_kind, dataset_key)
+    if not geocode_job.finished:
+        st.progress(geocode_job.done / max(geocode_job.total, 1),
+                    text=f'지오코딩 중... {geocode_job.done}/{geocode_job.total} (좌표가 도착하는 대로 지도에 표시됩니다)')
+    elif geocode_job.failed:
+        st.caption(f'지오코딩 실패 {len(geocode_job.failed)}건 — 페이지를 새로 열면 다시 시도합니다.')
+
+# 유효한 좌표만 필터 (지오코딩 결과를 채운 사본과 좌표 해시까지 함께 캐시)
+progress = None if geocode_job is None else (id(geocode_job), geocode_job.done)
+df, valid, map_df, df_digest, map_digest = prepare_points(dataset_key, progress, df, geocode_job)
 if not valid.any():
     st.warning('유효한 좌표가 없습니다. CSV에 위도/경도 컬럼을 추가하거나 requests를 설치해 지오코딩을 허용하세요.')
 
-map_df = df[valid].copy()
+
+perf.mark('주변 검색')
+# 주변 검색: 공간 인덱스로 반경 / k-최근접 지점을 찾아 지도와 목록을 모두 그 결과로 바꿈
+st.sidebar.markdown('---')
+st.sidebar.subheader('주변 검색')
+near_mode = st.sidebar.radio('주변 검색', ['사용 안 함', '반경 안', '가까운 k곳'], label_visibility='collapsed')
+near_point = None
+if near_mode != '사용 안 함' and not map_df.empty:
+    # 후보는 좌표 유무와 상관없이 데이터셋 앞쪽 행(행 번호) — 지오코딩으로 map_df가 늘어나도 선택이 유지됨
+    anchor_names = df['name'].astype(str).head(NEAR_ANCHOR_OPTIONS)
+    anchor = st.sidebar.selectbox('기준 지점', [None] + anchor_names.index.tolist(), key='geo_near_anchor',
+                                  format_func=lambda row: '내 위치 / 좌표 직접 입력' if row is None else anchor_names[row])
+    if anchor is not None and not valid[anchor]:
+        st.sidebar.caption('이 지점은 아직 좌표가 없어 직접 입력한 좌표를 씁니다.')
+        anchor = None
+    if anchor is None:
+        # 키가 있어야 지오코딩 중 평균 좌표(기본값)가 바뀌어도 입력한 값이 유지됨
+        near_lat = st.sidebar.number_input('위도', -90.0, 90.0, float(map_df['latitude'].mean()), format='%.5f',
+                                           key='geo_near_lat')
+        near_lon = st.sidebar.number_input('경도', -180.0, 180.0, float(map_df['longitude'].mean()), format='%.5f',
+                                           key='geo_near_lon')
+    else:
+        near_lat, near_lon = df.loc[anchor, ['latitude', 'longitude']]
+    near_point = (float(near_lat), float(near_lon))
+    if near_mode == '반경 안':
+        near_radius = st.sidebar.slider('반경 (km)', 1, 500, 50)
+    else:
+        near_k = int(st.sidebar.number_input('k', 1, 1000, 10))
+
+near_df = None
+if near_point is not None:
+    geo_index = build_geo_index(df_digest, df)
+    if near_mode == '반경 안':
+        rows, dist = geo_index.radius(*near_point, near_radius)
+    else:
+        rows, dist = geo_index.nearest(*near_point, near_k)
+    near_df = df.iloc[rows].assign(distance_km=dist)
+    map_df, map_digest = near_df, coordinates_digest(near_df)
+
+# 지도 표시: 확대 수준과 클러스터 여부
+st.sidebar.markdown('---')
+st.sidebar.subheader('지도 표시')
+map_mode = st.sidebar.radio('지도 표시', ['자동', '클러스터', '개별 지점'], horizontal=True, label_visibility='collapsed',
+                            help=f'자동: 화면 안 지점이 {MAX_RAW_POINTS:,}곳 이하이면 개별 지점, 많으면 격자 클러스터')
+map_zoom = st.sidebar.slider('확대 수준', *MAP_ZOOM_RANGE, DEFAULT_MAP_ZOOM)
 
 # 레이아웃
 st.title('🇰🇷 대한민국 국가지질공원 지도')
 col_map, col_list = st.columns((2, 1))
 
+perf.mark('지도')
 with col_map:
     st.subheader('지도')
+    if near_df is not None:
+        st.caption(f'기준 지점 ({near_point[0]:.5f}, {near_point[1]:.5f}) 주변 {len(near_df)}곳')
 
     if map_df.empty:
         st.info('표시할 좌표가 없습니다.')
     else:
+        midpoint = near_point or (float(map_df['latitude'].mean()), float(map_df['longitude'].mean()))
+        show_all = len(map_df) <= MAX_RAW_POINTS
+        if show_all:
+            # 적으면 화면 밖 지점(클러스터)까지 모두 보냄 — 확대·이동해도 지점이 사라지지 않음
+            in_view = slice(None)
+            mode = choose_map_mode(map_mode, len(map_df))
+        else:
+            lat_all = map_df['latitude'].to_numpy(dtype=float)
+            lon_all = map_df['longitude'].to_numpy(dtype=float)
+            in_view = view_mask(lat_all, lon_all, midpoint, map_zoom)
+            mode = choose_map_mode(map_mode, int(in_view.sum()))
+        if mode == '클러스터':
+            cells = build_cluster_level(map_digest, map_zoom, map_df)
+            if not show_all:
+                cells = cells[view_mask(cells['latitude'].to_numpy(), cells['longitude'].to_numpy(), midpoint, map_zoom)]
+            plot_df = cells
+            st.caption(f'클러스터 {len(plot_df):,}개 (지점 {int(plot_df["count"].sum()):,}곳) — 확대하면 개별 지점으로 바뀝니다.')
+        else:
+            plot_df = map_df.loc[in_view, MAP_COLUMNS]
+
         # pydeck 사용 가능하면 세밀한 뷰, 아니면 st.map
-        if _HAS_PYDECK:
-            midpoint = (map_df['latitude'].mean(), map_df['longitude'].mean())
-            view_state = pdk.ViewState(latitude=midpoint[0], longitude=midpoint[1], zoom=6, pitch=30)
-            layer = pdk.Layer(
-                'ScatterplotLayer',
-                data=map_df,
-                get_position='[longitude, latitude]',
-                get_fill_color='[255, 99, 71, 160]',
-                get_radius=5000,
-                pickable=True,
-                auto_highlight=True,
-            )
+        pdk = load_pydeck()
+        if pdk is not None:
+            view_state = pdk.ViewState(latitude=midpoint[0], longitude=midpoint[1], zoom=map_zoom, pitch=30)
+            if mode == '클러스터':
+                layers = [
+                    pdk.Layer('ScatterplotLayer', data=plot_df, get_position='[longitude, latitude]',
+                              get_fill_color='[255, 99, 71, 160]', get_radius='radius', radius_units='pixels',
+                              pickable=True, auto_highlight=True),
+                    pdk.Layer('TextLayer', data=plot_df[plot_df['count'] > 1].assign(label=lambda c: c['count'].astype(str)),
+                              get_position='[longitude, latitude]', get_text='label', get_size=12,
+                              get_color='[255, 255, 255, 230]'),
+                ]
+            else:
+                layers = [pdk.Layer(
+                    'ScatterplotLayer',
+                    data=plot_df,
+                    get_position='[longitude, latitude]',
+                    get_fill_color='[255, 99, 71, 160]',
+                    get_radius=5000,
+                    radius_min_pixels=3,
+                    radius_max_pixels=12,
+                    pickable=True,
+                    auto_highlight=True,
+                )]
+            if near_point is not None:
+                # 기준 지점(파란 점)과 검색 반경
+                center = pd.DataFrame({'latitude': [near_point[0]], 'longitude': [near_point[1]],
+                                       'name': ['기준 지점'], 'description': ['']})
+                layers.append(pdk.Layer('ScatterplotLayer', data=center, get_position='[longitude, latitude]',
+                                        get_fill_color='[30, 144, 255, 220]', get_radius=3000))
+                if near_mode == '반경 안':
+                    layers.append(pdk.Layer('ScatterplotLayer', data=center, get_position='[longitude, latitude]',
+                                            get_radius=near_radius * 1000, filled=False, stroked=True,
+                                            get_line_color='[30, 144, 255, 200]', line_width_min_pixels=2))
             tooltip = {"html": "<b>{name}</b><br/>{description}", "style": {"backgroundColor": "#111", "color": "#fff"}}
-            deck = pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip)
+            deck = pdk.Deck(layers=layers, initial_view_state=view_state, tooltip=tooltip)
             st.pydeck_chart(deck)
         else:
-            # 간단한 지도
-            st.map(map_df[['latitude', 'longitude']].rename(columns={'latitude':'lat','longitude':'lon'}))
+            # 간단한 지도 — 클러스터는 지점 수에 비례한 크기(m)로
+            simple = plot_df[['latitude', 'longitude']].rename(columns={'latitude':'lat','longitude':'lon'})
+            if mode == '클러스터':
+                simple['size'] = plot_df['radius'] * degrees_per_pixel(map_zoom) * KM_PER_DEG * 1000
+                st.map(simple, size='size', zoom=map_zoom)
+            else:
+                st.map(simple, zoom=map_zoom)
 
+perf.mark('목록/검색')
 with col_list:
     st.subheader('지오파크 목록')
-    q = st.text_input('검색: 지오파크명')
+    q = st.text_input('검색: 이름/설명 (초성·자모 가능)', key='geo_query',
+                      on_change=lambda: st.session_state.update(geo_page=1))
+    # 주변 검색 중이면 가까운 순, 검색어가 있으면 점수순 (행 번호 배열)
+    rows = np.arange(len(df)) if near_df is None else near_df.index.to_numpy()
     if q:
-        shown = df[df['name'].str.contains(q, case=False, na=False)]
-    else:
-        shown = df
+        ranked = build_search_index(dataset_key, df).search(q)
+        rows = ranked if near_df is None else ranked[np.isin(ranked, rows)]
 
-    if shown.empty:
+    if not len(rows):
         st.info('검색 결과가 없습니다.')
     else:
-        for _, r in shown.iterrows():
-            st.markdown(f"**{r['name']}**")
-            if r.get('description'):
-                st.write(r['description'])
+        pages = (len(rows) - 1) // SEARCH_PAGE_SIZE + 1
+        if st.session_state.get('geo_page', 1) > pages:
+            st.session_state['geo_page'] = pages
+        page = int(st.number_input(f'페이지 (전체 {pages})', 1, pages, key='geo_page')) if pages > 1 else 1
+        first = (page - 1) * SEARCH_PAGE_SIZE
+        page_rows = rows[first:first + SEARCH_PAGE_SIZE]
+        st.caption(f'{len(rows)}건 중 {first + 1}–{first + len(page_rows)}')
+        # 한 페이지 분량만, 지점마다 요소 하나로 그림
+        for pos in page_rows:
+            r = df.iloc[pos]
+            lines = [f"**{r['name']}**"]
+            if r.get('description') and pd.notna(r.get('description')):
+                lines.append(str(r['description']))
             lat = r.get('latitude')
             lon = r.get('longitude')
             if pd.notna(lat) and pd.notna(lon):
-                st.write(f"위도: {lat:.6f}  경도: {lon:.6f}")
+                lines.append(f"위도: {lat:.6f}  경도: {lon:.6f}")
             else:
-                st.write('위치 정보(좌표) 없음')
-            st.write('---')
-
-# CSV 다운로드: 현재 데이터
-@st.cache_data
-def df_to_csv_bytes(df_local: pd.DataFrame) -> bytes:
-    return df_local.to_csv(index=False).encode('utf-8')
+                lines.append('위치 정보(좌표) 없음')
+            if near_df is not None:
+                lines.append(f"거리: {near_df.at[pos, 'distance_km']:.2f} km")
+            st.markdown('  \n'.join(lines) + '\n\n---')
 
+# CSV 다운로드: 현재 데이터 — 재실행마다 직렬화(와 캐시 키용 해시)하지 않고 버튼을 누를 때만 만듦
+perf.mark('다운로드')
 if not df.empty:
-    csv_bytes = df_to_csv_bytes(df)
-    st.download_button('현재 데이터 다운로드 (CSV)', data=csv_bytes, file_name='korea_geoparks.csv', mime='text/csv')
+    st.download_button('현재 데이터 다운로드 (CSV)', data=lambda: df.to_csv(index=False).encode('utf-8'),
+                       file_name='korea_geoparks.csv', mime='text/csv', on_click='ignore')
 
 # 예제 CSV 만들기
 if st.sidebar.button('예제 CSV 생성'):
@@ -251,4 +793,11 @@ st.sidebar.header('실행/설치 안내')
 st.sidebar.code('pip install streamlit pandas requests pydeck')
 st.sidebar.write('requests가 없으면 앱이 지오코딩을 수행하지 못합니다. 오류가 나면 설치 후 다시 실행하세요.')
 
+perf.finish()
+
+# 지오코딩이 진행 중이면 잠시 후 다시 그려서 새로 도착한 좌표를 반영
+if geocode_job is not None and not geocode_job.finished:
+    time.sleep(GEOCODE_POLL_SECONDS)
+    st.rerun()
+
 # 끝
@@ -4,46 +4,227 @@ streamlit_hr_diagram_safe.py
 안정화된 H-R 다이어그램 Streamlit 앱
 - CSV 컬럼 이름이 다양해도 안전하게 처리
 - KeyError 방지 및 컬럼 매핑을 사이드바에서 직접 선택 가능
-- 의존성: streamlit, pandas, numpy, plotly(optional)
+- 대용량 카탈로그: 매핑된 컬럼만 청크 단위로 읽고 float32로 줄여 파일 해시별로 캐시
+- 의존성: streamlit, pandas, numpy, plotly(optional), pyarrow(optional — Parquet/Arrow 입력 및 디스크 캐시)
 """
 
+import gzip
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import math
 
-try:
-    import plotly.express as px
-    _HAS_PLOTLY = True
-except ImportError:
-    _HAS_PLOTLY = False
+import perf
+from hr_index import HRIndex
+
+
+# Optional heavy libraries are imported on the code path that first needs them, once per process,
+# so the page starts rendering before they load.
+@perf.cache_resource
+def load_plotly():
+    """(plotly.express, plotly.graph_objects), or None without plotly (matplotlib fallback)."""
+    try:
+        import plotly.express as px
+        import plotly.graph_objects as go
+    except ImportError:
+        return None
+    return px, go
+
+
+@perf.cache_resource
+def load_pyarrow():
+    """pyarrow with ipc/feather/parquet loaded (Parquet/Arrow input and on-disk column cache), or None."""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
 
+perf.start_run('hr')
 st.set_page_config(page_title='H-R Diagram Explorer', layout='wide')
 
 # ----------------------
 # Sample data
 # ----------------------
-SAMPLE = pd.DataFrame([
-    {'name': 'Sun', 'Teff': 5772, 'Radius_Rsun': 1.0, 'Mbol': 4.74},
-    {'name': 'Sirius A', 'Teff': 9900, 'Radius_Rsun': 1.71, 'Mbol': 1.42},
-    {'name': 'Vega', 'Teff': 9600, 'Radius_Rsun': 2.362, 'Mbol': 0.58},
-    {'name': 'Arcturus', 'Teff': 4286, 'Radius_Rsun': 25.4, 'Mbol': -0.30},
-    {'name': 'Betelgeuse', 'Teff': 3500, 'Radius_Rsun': 887, 'Mbol': -5.85},
-    {'name': 'Rigel', 'Teff': 11000, 'Radius_Rsun': 78.9, 'Mbol': -7.84},
-])
+@perf.cache_resource
+def sample_dataset():
+    """Built once per process and shared between sessions — do not mutate."""
+    return pd.DataFrame([
+        {'name': 'Sun', 'Teff': 5772, 'Radius_Rsun': 1.0, 'Mbol': 4.74},
+        {'name': 'Sirius A', 'Teff': 9900, 'Radius_Rsun': 1.71, 'Mbol': 1.42},
+        {'name': 'Vega', 'Teff': 9600, 'Radius_Rsun': 2.362, 'Mbol': 0.58},
+        {'name': 'Arcturus', 'Teff': 4286, 'Radius_Rsun': 25.4, 'Mbol': -0.30},
+        {'name': 'Betelgeuse', 'Teff': 3500, 'Radius_Rsun': 887, 'Mbol': -5.85},
+        {'name': 'Rigel', 'Teff': 11000, 'Radius_Rsun': 78.9, 'Mbol': -7.84},
+    ])
+
 
 # ----------------------
-# Sidebar: CSV upload and column mapping
+# Ingestion: header first, then only the mapped columns
+# ----------------------
+CACHE_DIR = os.environ.get('HR_CACHE_DIR', '.hr_cache')
+CACHE_MAX_BYTES = int(os.environ.get('HR_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+CSV_CHUNK_ROWS = 500_000
+UPLOAD_TYPES = ['csv', 'gz']
+ARROW_UPLOAD_TYPES = ['parquet', 'arrow', 'feather']  # offered only when pyarrow is installed
+
+
+def file_hash(uploaded):
+    """SHA-1 of the upload, hashed once per upload and kept in the session."""
+    if st.session_state.get('hr_upload_id') != uploaded.file_id:
+        st.session_state['hr_upload_digest'] = hashlib.sha1(uploaded.getbuffer()).hexdigest()
+        st.session_state['hr_upload_id'] = uploaded.file_id
+    return st.session_state['hr_upload_digest']
+
+
+def file_format(name):
+    """('csv' | 'parquet' | 'arrow', compression) from the file name."""
+    lower = name.lower()
+    if lower.endswith('.parquet'):
+        return 'parquet', None
+    if lower.endswith(('.arrow', '.feather')):
+        return 'arrow', None
+    return 'csv', 'gzip' if lower.endswith('.gz') else None
+
+
+@perf.cache_data
+def source_columns(digest, _uploaded):
+    """Column names of the uploaded file, read without loading any rows."""
+    fmt, compression = file_format(_uploaded.name)
+    _uploaded.seek(0)
+    if fmt == 'parquet':
+        return list(load_pyarrow().parquet.read_schema(_uploaded).names)
+    if fmt == 'arrow':
+        return list(load_pyarrow().ipc.open_file(_uploaded).schema.names)
+    return list(pd.read_csv(_uploaded, nrows=0, compression=compression).columns)
+
+
+def _compact_text(values):
+    values = values.astype('string')
+    # Repetitive labels (spectral types) are much smaller as categories.
+    return values.astype('category') if values.nunique() < len(values) // 2 else values
+
+
+def _downcast(frame, text_columns, categorize=True):
+    """float32 for numeric columns (plenty for magnitudes/temperatures), string/category for text."""
+    out = {}
+    for col in frame.columns:
+        if col in text_columns:
+            out[col] = _compact_text(frame[col]) if categorize else frame[col].astype('string')
+        else:
+            out[col] = pd.to_numeric(frame[col], errors='coerce').astype(np.float32)
+    return pd.DataFrame(out, index=frame.index)
+
+
+def _read_source(uploaded, columns, text_columns):
+    fmt, compression = file_format(uploaded.name)
+    uploaded.seek(0)
+    if fmt == 'parquet':
+        return _downcast(pd.read_parquet(uploaded, columns=columns), text_columns)
+    if fmt == 'arrow':
+        return _downcast(load_pyarrow().feather.read_table(uploaded, columns=columns).to_pandas(), text_columns)
+    # Stream CSV in chunks so peak memory is the compact result plus one chunk.
+    dtypes = {c: 'string' for c in columns if c in text_columns}
+    chunks = [
+        _downcast(chunk, text_columns, categorize=False)
+        for chunk in pd.read_csv(uploaded, usecols=columns, dtype=dtypes, compression=compression,
+                                 chunksize=CSV_CHUNK_ROWS)
+    ]
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+    for col in columns:
+        if col in text_columns:
+            frame[col] = _compact_text(frame[col])
+    return frame
+
+
+def _artifact_key(col, is_text):
+    # The same source column may be parsed as text (name) and as numbers (Teff) under different mappings.
+    return f'{col}::{"text" if is_text else "num"}'
+
+
+def _evict_artifacts(keep):
+    """Delete the least recently used artifacts until CACHE_DIR fits in CACHE_MAX_BYTES."""
+    # Skip temporary files another session is still writing.
+    entries = sorted((entry for entry in os.scandir(CACHE_DIR)
+                      if entry.is_file() and not entry.name.endswith('.tmp')),
+                     key=lambda entry: entry.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in entries)
+    for entry in entries:
+        if total <= CACHE_MAX_BYTES:
+            break
+        if entry.path == keep:
+            continue
+        try:
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            total -= size
+        except OSError:
+            pass
+
+
+@perf.cache_resource(max_entries=4)
+def load_columns(digest, columns, text_columns, _uploaded):
+    """Parsed columns of one upload, cached in memory and as a Parquet artifact keyed by file hash.
+
+    Columns already in the artifact are read back directly; only newly mapped columns
+    go through the (slow) source parser. The returned frame is shared — do not mutate it.
+    """
+    text_columns = set(text_columns)
+    wanted = {_artifact_key(c, c in text_columns): c for c in columns}
+    artifact = os.path.join(CACHE_DIR, f'{digest}.parquet')
+    pyarrow = load_pyarrow()
+    available = set(pyarrow.parquet.read_schema(artifact).names) if pyarrow and os.path.exists(artifact) else set()
+    missing = [c for key, c in wanted.items() if key not in available]
+    if available:
+        os.utime(artifact)  # refresh LRU order
+    if not missing:
+        stored = pd.read_parquet(artifact, columns=list(wanted))
+    else:
+        stored = pd.read_parquet(artifact) if available else pd.DataFrame()
+        fresh = _read_source(_uploaded, missing, text_columns)
+        fresh.columns = [_artifact_key(c, c in text_columns) for c in fresh.columns]
+        stored = pd.concat([stored, fresh], axis=1) if len(stored.columns) else fresh
+        if pyarrow:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # One temp file per writer: two sessions may convert the same upload at once.
+            tmp = f'{artifact}.{os.getpid()}.{threading.get_ident()}.tmp'
+            stored.to_parquet(tmp, index=False)
+            os.replace(tmp, artifact)
+            _evict_artifacts(keep=artifact)
+    return stored[list(wanted)].set_axis(list(wanted.values()), axis=1)
+
+
+# ----------------------
+# Sidebar: data upload and column mapping
 # ----------------------
 st.sidebar.header('Data Upload & Column Mapping')
-uploaded = st.sidebar.file_uploader('Upload CSV (optional)', type=['csv'])
+# find_spec checks for pyarrow without importing it.
+if importlib.util.find_spec('pyarrow') is not None:
+    uploaded = st.sidebar.file_uploader('Upload catalog (CSV, CSV.gz, Parquet, Arrow/Feather)',
+                                        type=UPLOAD_TYPES + ARROW_UPLOAD_TYPES)
+else:
+    uploaded = st.sidebar.file_uploader('Upload catalog (CSV, CSV.gz)', type=UPLOAD_TYPES)
 use_sample = st.sidebar.checkbox('Use sample dataset', value=True)
 
-# Load data
+# Read only the header here; rows are loaded after the mapping is known.
+perf.mark('read header')
 if uploaded is not None:
-    df = pd.read_csv(uploaded)
+    if file_format(uploaded.name)[0] != 'csv' and load_pyarrow() is None:
+        st.error('Reading Parquet/Arrow files needs pyarrow: `pip install pyarrow`, or upload a CSV.')
+        st.stop()
+    digest = file_hash(uploaded)
+    cols = source_columns(digest, uploaded)
 elif use_sample:
-    df = SAMPLE.copy()
+    cols = list(sample_dataset().columns)
 else:
     st.info('Upload a CSV or enable sample dataset.')
     st.stop()
@@ -51,8 +232,8 @@ else:
 # ----------------------
 # Column mapping UI
 # ----------------------
+perf.mark('column mapping')
 st.sidebar.subheader('Column Mapping')
-cols = list(df.columns)
 name_col = st.sidebar.selectbox('Name column', options=[None]+cols, index=cols.index('name') if 'name' in cols else 0)
 teff_col = st.sidebar.selectbox('Teff column', options=[None]+cols)
 bv_col = st.sidebar.selectbox('B-V column', options=[None]+cols)
@@ -62,70 +243,390 @@ mv_col = st.sidebar.selectbox('mV column', options=[None]+cols)
 dist_col = st.sidebar.selectbox('Distance column', options=[None]+cols)
 mbol_col = st.sidebar.selectbox('Mbol column', options=[None]+cols)
 
-# ----------------------
-# Prepare working DataFrame
-# ----------------------
-work = pd.DataFrame()
-if name_col:
-    work['name'] = df[name_col].astype(str)
+# Load data
+perf.mark('load columns')
+if uploaded is not None:
+    mapped = [c for c in (name_col, teff_col, bv_col, spec_col, radius_col, mv_col, dist_col, mbol_col) if c]
+    # Always read at least one column so the row count is known.
+    needed = tuple(dict.fromkeys(mapped)) or tuple(cols[:1])
+    text_cols = tuple(c for c in (name_col, spec_col) if c)
+    df = load_columns(digest, needed, text_cols, uploaded)
 else:
-    work['name'] = df.index.astype(str)
-
-def safe_numeric(col):
-    if col and col in df.columns:
-        return pd.to_numeric(df[col], errors='coerce')
-    else:
-        return np.nan
-
-work['Teff'] = safe_numeric(teff_col)
-work['B-V'] = safe_numeric(bv_col)
-work['Radius_Rsun'] = safe_numeric(radius_col)
-work['mV'] = safe_numeric(mv_col)
-work['distance_pc'] = safe_numeric(dist_col)
-work['Mbol_input'] = safe_numeric(mbol_col)
+    df = sample_dataset()
 
 # ----------------------
-# Derived quantities
+# Derived quantities (vectorized)
 # ----------------------
 SIGMA = 5.670374419e-8
 R_SUN = 6.957e8
 L_SUN = 3.828e26
 M_BOL_SUN = 4.74
+T_SUN = (L_SUN / (4 * np.pi * R_SUN**2 * SIGMA)) ** 0.25
+
+# Main-sequence Teff by spectral type, keyed by class*10 + subclass (O0 = 0 ... M9 = 69).
+SPEC_CLASSES = 'OBAFGKM'
+_SPEC_TABLE = np.array([
+    (3, 44900), (5, 41400), (7, 36500), (9, 31900),
+    (10, 31400), (12, 20600), (15, 15700), (18, 12500),
+    (20, 9700), (22, 8840), (25, 8080), (27, 7820),
+    (30, 7220), (32, 6810), (35, 6510), (38, 6170),
+    (40, 5920), (42, 5770), (45, 5660), (48, 5490),
+    (50, 5280), (52, 5040), (55, 4450), (57, 4050),
+    (60, 3850), (62, 3560), (64, 3210), (66, 2850), (69, 2400),
+], dtype=float)
+_SPEC_RE = r'^\s*([OBAFGKMobafgkm])\s*(\d+(?:\.\d+)?)?'
+
+# Flower (1996) bolometric correction polynomials in log10(Teff), coefficients from Torres (2010).
+_BC_COOL = [-0.190537291496456e+05, 0.155144866764412e+05, -0.421278819301717e+04, 0.381476328422343e+03]
+_BC_MID = [-0.370510203809015e+05, 0.385672629965804e+05, -0.150651486316025e+05,
+           0.261724637119416e+04, -0.170623810323864e+03]
+_BC_HOT = [-0.118115450538963e+06, 0.137145973583929e+06, -0.636233812100225e+05,
+           0.147412923562646e+05, -0.170587278406872e+04, 0.788731721804990e+02]
+
+
+def teff_from_bv(bv):
+    """Ballesteros (2012) black-body color-temperature relation."""
+    bv = np.where((bv > -0.4) & (bv < 2.5), bv, np.nan)
+    return 4600.0 * (1.0 / (0.92 * bv + 1.7) + 1.0 / (0.92 * bv + 0.62))
+
+
+def teff_from_spectral(spec):
+    """Parse spectral types like 'G2V' or 'K1.5III' and interpolate the lookup table.
+
+    Only unique strings are parsed, so large catalogs with few distinct types stay cheap.
+    A missing subclass is treated as 5 (mid-class).
+    """
+    codes, uniques = pd.factorize(pd.Series(spec))
+    if len(uniques) == 0:
+        return np.full(len(codes), np.nan)
+    parts = pd.Series(np.asarray(uniques, dtype=object)).astype('string').str.extract(_SPEC_RE)
+    cls = parts[0].str.upper().map({c: i for i, c in enumerate(SPEC_CLASSES)}).to_numpy(dtype=float)
+    sub = pd.to_numeric(parts[1], errors='coerce').fillna(5.0).to_numpy(dtype=float)
+    teff_unique = np.interp(cls * 10 + sub, _SPEC_TABLE[:, 0], _SPEC_TABLE[:, 1])
+    teff_unique[np.isnan(cls)] = np.nan
+    return np.where(codes >= 0, teff_unique[codes], np.nan)
+
+
+def bolometric_correction(teff):
+    logt = np.log10(teff)
+    return np.select(
+        [logt < 3.70, logt < 3.90, logt >= 3.90],
+        [np.polynomial.polynomial.polyval(logt, _BC_COOL),
+         np.polynomial.polynomial.polyval(logt, _BC_MID),
+         np.polynomial.polynomial.polyval(logt, _BC_HOT)],
+        default=np.nan,
+    )
 
-def luminosity_from_tr(teff, radius):
-    try:
-        L = 4 * math.pi * (radius*R_SUN)**2 * SIGMA * teff**4
-        return L / L_SUN
-    except:
-        return np.nan
 
-work['L/Lsun'] = [luminosity_from_tr(row['Teff'], row['Radius_Rsun']) if not pd.isna(row['Teff']) and not pd.isna(row['Radius_Rsun']) else np.nan for idx, row in work.iterrows()]
-work['logL'] = np.log10(work['L/Lsun'].replace({0: np.nan}))
-work['logTeff'] = np.log10(work['Teff'].replace({0: np.nan}))
+def resolve_teff(teff, bv, spectral):
+    """Teff from the Teff column, else B-V color, else spectral type.
+
+    Returns (teff, method) where method records which rule produced each row.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        teff = np.where(teff > 0, teff, np.nan)
+        method = np.where(np.isfinite(teff), 'Teff', None).astype(object)
+        for name, estimate in (
+            ('B-V', lambda: teff_from_bv(bv)),
+            ('spectral', lambda: teff_from_spectral(spectral)),
+        ):
+            missing = ~np.isfinite(teff)
+            if not missing.any():
+                break
+            est = estimate()
+            fill = missing & np.isfinite(est) & (est > 0)
+            teff = np.where(fill, est, teff)
+            method[fill] = name
+    return teff, method
+
+
+def resolve_luminosity(teff, radius, mbol, mv, dist):
+    """L/Lsun from Teff + radius (Stefan-Boltzmann), else Mbol, else mV + distance + BC.
+
+    Returns (lum, method) where method records which rule produced each row.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lum = np.where(radius > 0, radius**2 * (teff / T_SUN) ** 4, np.nan)
+        method = np.where(np.isfinite(lum), 'Teff+R', None).astype(object)
+
+        missing = ~np.isfinite(lum)
+        if missing.any():
+            est = 10 ** (-0.4 * (mbol - M_BOL_SUN))
+            fill = missing & np.isfinite(est)
+            lum = np.where(fill, est, lum)
+            method[fill] = 'Mbol'
+
+        missing = ~np.isfinite(lum)
+        if missing.any():
+            abs_mag = mv - 5 * np.log10(np.where(dist > 0, dist, np.nan) / 10)
+            est = 10 ** (-0.4 * (abs_mag + bolometric_correction(teff) - M_BOL_SUN))
+            fill = missing & np.isfinite(est)
+            lum = np.where(fill, est, lum)
+            method[fill] = 'mV+dist+BC'
+
+        lum = np.where(lum > 0, lum, np.nan)
+    return lum, method
+
+
+# ----------------------
+# Spatial index and H-R regions
+# ----------------------
+# Coarse main-sequence ridge (logTeff, logL) used to label regions of the diagram.
+_MS_RIDGE = np.array([
+    (3.45, -2.6), (3.58, -1.3), (3.70, -0.4), (3.76, 0.0), (3.86, 0.6),
+    (3.98, 1.4), (4.18, 2.8), (4.40, 4.0), (4.60, 5.3),
+])
+REGIONS = ('main sequence', 'giant', 'supergiant', 'white dwarf', 'subdwarf')
+
+
+def classify_regions(log_teff, log_l):
+    """Label each star by its offset from the main-sequence ridge (NaN inputs -> None)."""
+    with np.errstate(invalid='ignore'):
+        offset = log_l - np.interp(log_teff, _MS_RIDGE[:, 0], _MS_RIDGE[:, 1])
+        labels = np.select(
+            [np.abs(offset) <= 0.8,
+             (offset > 0.8) & (log_l >= 3.5),
+             offset > 0.8,
+             offset < -2.0,
+             offset < -0.8],
+            ['main sequence', 'supergiant', 'giant', 'white dwarf', 'subdwarf'],
+            default='',
+        ).astype(object)
+    labels[labels == ''] = None
+    return labels
+
+
+@perf.cache_resource(max_entries=8)
+def build_index(digest, mapping, _work):
+    return HRIndex(_work['logTeff'].to_numpy(dtype=float), _work['logL'].to_numpy(dtype=float))
+
+
+# ----------------------
+# Working DataFrame (memoized per stage)
+# ----------------------
+# Each stage is cached on (dataset hash, the mapped columns it depends on), so changing one
+# mapping only recomputes the stages downstream of it. `_df` is not hashed; the digest stands in.
+def _numeric(frame, col):
+    if col and col in frame.columns:
+        return pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return np.full(len(frame), np.nan)
+
+
+@perf.cache_resource(max_entries=64)
+def input_stage(digest, col, _df):
+    return _numeric(_df, col)
+
+
+@perf.cache_resource(max_entries=16)
+def teff_stage(digest, teff_col, bv_col, spec_col, _df):
+    spectral = _df[spec_col] if spec_col else pd.Series(pd.NA, index=_df.index, dtype='string')
+    return resolve_teff(input_stage(digest, teff_col, _df), input_stage(digest, bv_col, _df), spectral)
+
+
+@perf.cache_resource(max_entries=16)
+def luminosity_stage(digest, teff_cols, radius_col, mbol_col, mv_col, dist_col, _df):
+    teff, _ = teff_stage(digest, *teff_cols, _df)
+    return resolve_luminosity(teff, input_stage(digest, radius_col, _df), input_stage(digest, mbol_col, _df),
+                              input_stage(digest, mv_col, _df), input_stage(digest, dist_col, _df))
+
+
+@perf.cache_resource(max_entries=8)
+def build_work(digest, mapping, _df):
+    """Processed frame for one (dataset, column mapping); shared between reruns — do not mutate."""
+    name_col, teff_col, bv_col, spec_col, radius_col, mv_col, dist_col, mbol_col = mapping
+    teff_cols = (teff_col, bv_col, spec_col)
+    teff, teff_method = teff_stage(digest, *teff_cols, _df)
+    lum, lum_method = luminosity_stage(digest, teff_cols, radius_col, mbol_col, mv_col, dist_col, _df)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'name': _df[name_col].astype(str) if name_col else _df.index.astype(str),
+            'Teff': teff,
+            'B-V': input_stage(digest, bv_col, _df),
+            'spectral': _df[spec_col] if spec_col else pd.NA,
+            'Radius_Rsun': input_stage(digest, radius_col, _df),
+            'mV': input_stage(digest, mv_col, _df),
+            'distance_pc': input_stage(digest, dist_col, _df),
+            'Mbol_input': input_stage(digest, mbol_col, _df),
+            'Teff_method': teff_method,
+            'L/Lsun': lum,
+            'L_method': lum_method,
+            'logTeff': np.log10(teff),
+            'logL': np.log10(lum),
+            'region': classify_regions(np.log10(teff), np.log10(lum)),
+        }, index=_df.index)
+
+
+perf.mark('derive')
+mapping = (name_col, teff_col, bv_col, spec_col, radius_col, mv_col, dist_col, mbol_col)
+dataset = digest if uploaded is not None else 'sample'
+work = build_work(dataset, mapping, df)
 
 # ----------------------
-# Plot
+# Plot (level of detail)
 # ----------------------
+# Above MAX_POINTS stars in view, the full diagram is drawn as a 2D density image so the
+# payload depends on the bin grid, not the row count. Zooming into a small region
+# (at most ZOOM_FRACTION of the full area) switches to a fixed-size random sample of raw points.
+DEFAULT_MAX_POINTS = 20_000
+DEFAULT_BINS = 300
+ZOOM_FRACTION = 0.1
+
+
+def density_grid(x, y, x_range, y_range, bins):
+    """log10(count) on a bins x bins grid; empty cells are NaN so they render transparent."""
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=[x_range, y_range])
+    with np.errstate(divide='ignore'):
+        z = np.where(counts > 0, np.log10(counts), np.nan)
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, z.T
+
+
+def decimate(frame, max_points):
+    """Stable random subset (same rows on every rerun) of at most max_points rows."""
+    if len(frame) <= max_points:
+        return frame
+    rows = np.random.default_rng(0).choice(len(frame), size=max_points, replace=False)
+    return frame.iloc[np.sort(rows)]
+
+
+def choose_render_mode(mode, n_in_view, view_fraction, max_points):
+    if mode != 'Auto':
+        return mode
+    if n_in_view <= max_points:
+        return 'Points'
+    return 'Decimated points' if view_fraction <= ZOOM_FRACTION else 'Density'
+
+
+def _span(lo, hi):
+    return (lo, hi) if hi > lo else (lo - 0.5, hi + 0.5)
+
+
+TABLE_ROWS = 1_000
+
+perf.mark('plot')
 st.subheader('H-R Diagram')
+selection = None
 plot_df = work.dropna(subset=['logTeff','logL'])
 if plot_df.empty:
     st.warning('No valid data for plotting. Check your column mapping.')
 else:
-    if _HAS_PLOTLY:
-        fig = px.scatter(plot_df, x='logTeff', y='logL', hover_name='name', title='H-R Diagram')
+    methods = plot_df['L_method'].value_counts()
+    st.caption('Luminosity source: ' + ', '.join(f'{m} ({n:,})' for m, n in methods.items()))
+
+    st.sidebar.subheader('Rendering')
+    render_mode = st.sidebar.selectbox('Render mode', ['Auto', 'Density', 'Decimated points', 'Points'])
+    max_points = int(st.sidebar.number_input('Max raw points', min_value=1_000, value=DEFAULT_MAX_POINTS, step=5_000))
+    bins = st.sidebar.slider('Density bins', min_value=50, max_value=800, value=DEFAULT_BINS, step=50)
+    x_all = plot_df['logTeff'].to_numpy(dtype=float)
+    y_all = plot_df['logL'].to_numpy(dtype=float)
+    x_full = _span(float(x_all.min()), float(x_all.max()))
+    y_full = _span(float(y_all.min()), float(y_all.max()))
+    x_view = st.sidebar.slider('Zoom: logTeff range', *x_full, value=x_full, step=0.001)
+    y_view = st.sidebar.slider('Zoom: logL range', *y_full, value=y_full, step=0.01)
+
+    in_view = (x_all >= x_view[0]) & (x_all <= x_view[1]) & (y_all >= y_view[0]) & (y_all <= y_view[1])
+    view_fraction = ((x_view[1] - x_view[0]) * (y_view[1] - y_view[0])) / ((x_full[1] - x_full[0]) * (y_full[1] - y_full[0]))
+    n_in_view = int(in_view.sum())
+    mode = choose_render_mode(render_mode, n_in_view, view_fraction, max_points)
+    if mode == 'Density':
+        cx, cy, z = density_grid(x_all[in_view], y_all[in_view], _span(*x_view), _span(*y_view), bins)
+    else:
+        shown = plot_df[in_view]
+        if mode == 'Decimated points':
+            shown = decimate(shown, max_points)
+    st.caption(f'{n_in_view:,} stars in view — rendering: {mode}'
+               + (f' ({len(shown):,} drawn)' if mode != 'Density' else f' ({bins}×{bins} bins)'))
+
+    # Selection: nearest neighbours, a box, or a box/lasso drawn on the plot, answered by the grid index.
+    st.sidebar.subheader('Selection')
+    select_mode = st.sidebar.selectbox('Select stars', ['None', 'Nearest to point', 'Box', 'Drawn on plot', 'Region'])
+    hr_index = build_index(dataset, mapping, work)
+    selected_rows = None
+    if select_mode == 'Nearest to point':
+        qx = st.sidebar.number_input('logTeff', value=float(np.median(x_all)), format='%.3f')
+        qy = st.sidebar.number_input('logL', value=float(np.median(y_all)), format='%.2f')
+        k = int(st.sidebar.number_input('k', min_value=1, max_value=10_000, value=10))
+        selected_rows, _ = hr_index.nearest(qx, qy, k)
+    elif select_mode == 'Box':
+        bx = st.sidebar.slider('Box: logTeff', *x_full, value=x_full, step=0.001)
+        by = st.sidebar.slider('Box: logL', *y_full, value=y_full, step=0.01)
+        selected_rows = hr_index.box(bx, by)
+    elif select_mode == 'Drawn on plot':
+        event = st.session_state.get('hr_plot') or {}
+        shapes = event.get('selection', {})
+        parts = [hr_index.box(b['x'], b['y']) for b in shapes.get('box', [])]
+        parts += [hr_index.polygon(l['x'], l['y']) for l in shapes.get('lasso', [])]
+        selected_rows = np.unique(np.concatenate(parts)) if parts else None
+        if selected_rows is None:
+            st.caption('Use the box or lasso tool on the plot to select stars.')
+    elif select_mode == 'Region':
+        region = st.sidebar.selectbox('Region', REGIONS)
+        selected_rows = np.flatnonzero((work['region'] == region).to_numpy())
+
+    plotly = load_plotly()
+    if plotly:
+        px, go = plotly
+        if mode == 'Density':
+            fig = go.Figure(go.Heatmap(x=cx, y=cy, z=z, colorscale='Viridis',
+                                       colorbar={'title': 'log10 N'}, hovertemplate='logTeff=%{x:.3f}<br>logL=%{y:.2f}<br>log10 N=%{z:.2f}<extra></extra>'))
+            fig.update_layout(title='H-R Diagram (density)', xaxis_title='logTeff', yaxis_title='logL')
+        else:
+            fig = px.scatter(shown, x='logTeff', y='logL', hover_name='name', title='H-R Diagram',
+                             render_mode='webgl' if len(shown) > 5_000 else 'auto')
+        if selected_rows is not None and len(selected_rows):
+            picked = decimate(work.iloc[selected_rows], max_points)
+            fig.add_trace(go.Scattergl(x=picked['logTeff'], y=picked['logL'], mode='markers', name='selected',
+                                       text=picked['name'], marker={'color': 'red', 'size': 6}))
         fig.update_xaxes(autorange='reversed')
-        st.plotly_chart(fig, use_container_width=True)
+        if select_mode == 'Drawn on plot':
+            st.plotly_chart(fig, use_container_width=True, key='hr_plot', on_select='rerun',
+                            selection_mode=('box', 'lasso'))
+        else:
+            st.plotly_chart(fig, use_container_width=True)
     else:
         import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
-        ax.scatter(plot_df['logTeff'], plot_df['logL'])
+        if mode == 'Density':
+            ax.imshow(z, origin='lower', aspect='auto', cmap='viridis',
+                      extent=[*_span(*x_view), *_span(*y_view)])
+        else:
+            ax.scatter(shown['logTeff'], shown['logL'], s=4 if len(shown) > 5_000 else None)
+        if selected_rows is not None and len(selected_rows):
+            picked = decimate(work.iloc[selected_rows], max_points)
+            ax.scatter(picked['logTeff'], picked['logL'], s=8, color='red')
         ax.invert_xaxis()
         ax.set_xlabel('logTeff')
         ax.set_ylabel('logL')
         st.pyplot(fig)
 
+    if selected_rows is not None:
+        st.subheader(f'Selected stars ({len(selected_rows):,})')
+        selection = work.iloc[selected_rows]
+        st.dataframe(selection.head(TABLE_ROWS), use_container_width=True)
+        if len(selection) > TABLE_ROWS:
+            st.caption(f'Showing the first {TABLE_ROWS:,} rows; the download contains all of them.')
+
 # ----------------------
 # Data download
 # ----------------------
-csv_bytes = work.to_csv(index=False).encode('utf-8')
-st.download_button('Download processed data (CSV)', data=csv_bytes, file_name='hr_processed.csv')
+EXPORT_CHUNK_ROWS = 200_000
+
+
+def export_csv_gz(frame):
+    """gzip-compressed CSV, written chunk by chunk so the uncompressed text never exists in full."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=5) as gz:
+        for start in range(0, max(len(frame), 1), EXPORT_CHUNK_ROWS):
+            chunk = frame.iloc[start:start + EXPORT_CHUNK_ROWS]
+            gz.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+    return buffer.getvalue()
+
+
+# The callable runs only when the button is clicked, not on every rerun.
+perf.mark('download')
+if selection is not None:
+    st.download_button(f'Download selected stars ({len(selection):,}, CSV, gzip)', data=lambda: export_csv_gz(selection),
+                       file_name='hr_selection.csv.gz', mime='application/gzip', on_click='ignore')
+st.download_button('Download processed data (CSV, gzip)', data=lambda: export_csv_gz(work),
+                   file_name='hr_processed.csv.gz', mime='application/gzip', on_click='ignore')
+
+perf.finish()
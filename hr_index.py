@@ -0,0 +1,110 @@
+"""
+hr_index.py
+
+Grid index over the H-R plane used by hr.py (no Streamlit dependency)
+- Uniform grid over (logTeff, logL) with points sorted by cell and CSR offsets.
+- k-nearest-neighbour, box and polygon (lasso) queries answered from the cells they touch.
+- Dependencies: numpy
+"""
+
+import numpy as np
+
+GRID_POINTS_PER_CELL = 8
+
+
+def points_in_polygon(x, y, px, py):
+    """Even-odd ray casting, vectorized over points (loops over the polygon's edges)."""
+    inside = np.zeros(len(x), dtype=bool)
+    for i in range(len(px)):
+        x1, y1, x2, y2 = px[i - 1], py[i - 1], px[i], py[i]
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+class HRIndex:
+    """Uniform grid index over (logTeff, logL) for k-NN, box and polygon queries.
+
+    Both axes are scaled to [0, 1] by the data range, so distances weigh a full Teff span
+    the same as a full luminosity span. Points are sorted by cell (row-major) with CSR
+    offsets, so each grid row of a query rectangle is one contiguous slice.
+    Queries return positional row numbers into the frame the index was built from.
+    """
+
+    def __init__(self, log_teff, log_l):
+        valid = np.isfinite(log_teff) & np.isfinite(log_l)
+        self.rows = np.flatnonzero(valid)
+        x, y = log_teff[valid], log_l[valid]
+        self.x0, self.y0, self.sx, self.sy = 0.0, 0.0, 1.0, 1.0
+        if len(x):
+            self.x0, self.y0 = x.min(), y.min()
+            self.sx = (x.max() - self.x0) or 1.0
+            self.sy = (y.max() - self.y0) or 1.0
+        self.g = max(1, int(np.sqrt(len(x) / GRID_POINTS_PER_CELL)))
+        cx, cy = self._cell(x, y)
+        cell = cy * self.g + cx
+        order = np.argsort(cell, kind='stable')
+        self.rows, self.u, self.v = self.rows[order], ((x - self.x0) / self.sx)[order], ((y - self.y0) / self.sy)[order]
+        self.starts = np.searchsorted(cell[order], np.arange(self.g * self.g + 1))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _cell(self, x, y):
+        cx = np.floor((x - self.x0) / self.sx * self.g).astype(np.int64)
+        cy = np.floor((y - self.y0) / self.sy * self.g).astype(np.int64)
+        return np.clip(cx, 0, self.g - 1), np.clip(cy, 0, self.g - 1)
+
+    def _candidates(self, cx0, cx1, cy0, cy1):
+        """Sorted-array positions of all points in the cell rectangle (inclusive, clipped)."""
+        cx0, cx1 = max(cx0, 0), min(cx1, self.g - 1)
+        cy0, cy1 = max(cy0, 0), min(cy1, self.g - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([
+            np.arange(self.starts[cy * self.g + cx0], self.starts[cy * self.g + cx1 + 1])
+            for cy in range(cy0, cy1 + 1)
+        ])
+
+    def box(self, x_range, y_range):
+        (x0, x1), (y0, y1) = sorted(x_range), sorted(y_range)
+        (cx0, cx1), (cy0, cy1) = self._cell(np.array([x0, x1]), np.array([y0, y1]))
+        pos = self._candidates(cx0, cx1, cy0, cy1)
+        u0, u1 = (x0 - self.x0) / self.sx, (x1 - self.x0) / self.sx
+        v0, v1 = (y0 - self.y0) / self.sy, (y1 - self.y0) / self.sy
+        u, v = self.u[pos], self.v[pos]
+        return self.rows[pos[(u >= u0) & (u <= u1) & (v >= v0) & (v <= v1)]]
+
+    def polygon(self, px, py):
+        px, py = np.asarray(px, dtype=float), np.asarray(py, dtype=float)
+        (cx0, cx1), (cy0, cy1) = self._cell(np.array([px.min(), px.max()]), np.array([py.min(), py.max()]))
+        pos = self._candidates(cx0, cx1, cy0, cy1)
+        inside = points_in_polygon(self.u[pos], self.v[pos], (px - self.x0) / self.sx, (py - self.y0) / self.sy)
+        return self.rows[pos[inside]]
+
+    def nearest(self, x, y, k):
+        """(rows, distances) of the k nearest stars, closest first (distance in scaled units)."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        u, v = (x - self.x0) / self.sx, (y - self.y0) / self.sy
+        qx, qy = int(np.floor(u * self.g)), int(np.floor(v * self.g))
+        # Start at the first ring that touches the grid when the query lies outside it.
+        r = max(0, -qx, qx - (self.g - 1), -qy, qy - (self.g - 1))
+        while True:
+            pos = self._candidates(qx - r, qx + r, qy - r, qy + r)
+            if len(pos) >= k:
+                d = np.hypot(self.u[pos] - u, self.v[pos] - v)
+                best = np.argpartition(d, k - 1)[:k]
+                # Everything outside the searched square is at least r cells away; once the square
+                # covers the whole grid (which takes longer when the query lies outside it) nothing is left.
+                if d[best].max() <= r / self.g or r >= max(qx, self.g - 1 - qx, qy, self.g - 1 - qy):
+                    best = best[np.argsort(d[best])]
+                    return self.rows[pos[best]], d[best]
+                # The k found so far bound the answer: no need to grow one ring at a time up to them.
+                r = max(r + 1, min(int(np.ceil(d[best].max() * self.g)),
+                                   max(qx, self.g - 1 - qx, qy, self.g - 1 - qy)))
+                continue
+            r += 1
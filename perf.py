@@ -0,0 +1,236 @@
+"""
+perf.py
+
+pokemon.py / nintendo.py / hr.py / geopark.py가 함께 쓰는 계측 모듈
+- 스크립트 구간별 실행 시간: 구간 시작마다 `mark('이름')` (또는 `with section('이름'):`)
+- 캐시 적중/미스: `st.cache_data` / `st.cache_resource` 대신 `perf.cache_data` / `perf.cache_resource`
+- 외부 HTTP 호출의 지연 시간과 상태 코드: `instrument_session(requests.Session())`
+- 한 번의 실행(rerun)이 끝나면 `finish()`가 사이드바 디버그 패널(선택)을 그리고,
+  PERF_LOG_PATH가 지정되어 있으면 결과를 JSON Lines로 덧붙입니다.
+
+환경 변수:
+    PERF_LOG_PATH   JSON Lines 로그 파일 경로 (없으면 기록하지 않음)
+    PERF_DEBUG=1    디버그 패널을 기본으로 펼침
+
+HTTP 호출은 작업자 스레드(이미지/카드 병렬 조회, 지오코딩 작업자)에서도 일어나므로 프로세스 전체에서
+모은 뒤, 각 실행에는 그 실행 도중에 끝난 호출을 보여 줍니다. 여러 세션이 동시에 실행되면 서로의 호출이
+섞여 보일 수 있습니다.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import streamlit as st
+
+PERF_LOG_PATH = os.environ.get('PERF_LOG_PATH')
+PERF_DEBUG = os.environ.get('PERF_DEBUG') == '1'
+HTTP_HISTORY = 1000  # 프로세스 전체에서 기억할 최근 HTTP 호출 수
+PANEL_HTTP_ROWS = 50
+
+_local = threading.local()
+_http_lock = threading.Lock()
+_http_events = deque(maxlen=HTTP_HISTORY)
+_log_lock = threading.Lock()
+
+
+class Run:
+    """스크립트 한 번 실행의 계측 결과."""
+
+    def __init__(self, app: str):
+        self.app = app
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.sections = []  # (이름, 초)
+        self.cache = {}  # 함수 이름 -> {'hits', 'misses', 'seconds'}
+        self._open: Optional[str] = None
+        self._open_t = self._t0
+        self.finished = False
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        if self._open is not None:
+            self.sections.append((self._open, now - self._open_t))
+        self._open, self._open_t = name, now
+
+    def close(self) -> float:
+        self.mark(None)
+        return time.perf_counter() - self._t0
+
+    def record_cache(self, name: str, hit: bool, seconds: float):
+        stats = self.cache.setdefault(name, {'hits': 0, 'misses': 0, 'seconds': 0.0})
+        stats['hits' if hit else 'misses'] += 1
+        stats['seconds'] += seconds
+
+
+def current_run() -> Optional[Run]:
+    return getattr(_local, 'run', None)
+
+
+def start_run(app: str) -> Run:
+    """스크립트 맨 위에서 호출. 이 세션의 앞선 실행이 st.stop()/st.rerun()으로 끝나 기록되지 않았으면 지금 기록."""
+    previous = st.session_state.get('_perf_run')
+    if previous is not None and not previous.finished:
+        _write_log(previous, previous.close(), complete=False)
+    run = _local.run = st.session_state['_perf_run'] = Run(app)
+    run.mark('시작')
+    return run
+
+
+def mark(name: str):
+    """지금부터 name 구간 (앞 구간은 여기서 끝남)."""
+    run = current_run()
+    if run is not None:
+        run.mark(name)
+
+
+@contextmanager
+def section(name: str):
+    mark(name)
+    try:
+        yield
+    finally:
+        mark(f'{name} 이후')
+
+
+# ----------------------
+# 캐시 적중/미스
+# ----------------------
+def _counting(cache_decorator, func, kwargs):
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def body(*args, **kw):
+        # 캐시 미스일 때만 실행됨 — 이 호출의 표시를 남김
+        stack = getattr(_local, 'calls', None)
+        if stack:
+            stack[-1][0] = True
+        return func(*args, **kw)
+
+    cached = cache_decorator(**kwargs)(body)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        stack = _local.__dict__.setdefault('calls', [])
+        flag = [False]
+        stack.append(flag)
+        start = time.perf_counter()
+        try:
+            return cached(*args, **kw)
+        finally:
+            stack.pop()
+            run = current_run()
+            if run is not None:
+                run.record_cache(name, hit=not flag[0], seconds=time.perf_counter() - start)
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+
+def cache_data(func=None, **kwargs):
+    """`st.cache_data`와 같게 쓰되, 실행마다 적중/미스와 걸린 시간을 기록."""
+    if func is None:
+        return lambda f: _counting(st.cache_data, f, kwargs)
+    return _counting(st.cache_data, func, kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    """`st.cache_resource`와 같게 쓰되, 실행마다 적중/미스와 걸린 시간을 기록."""
+    if func is None:
+        return lambda f: _counting(st.cache_resource, f, kwargs)
+    return _counting(st.cache_resource, func, kwargs)
+
+
+# ----------------------
+# HTTP 호출
+# ----------------------
+def record_http(method: str, url: str, status, seconds: float, error: Optional[str] = None):
+    parts = urlsplit(url)
+    event = {
+        'ts': time.time(),
+        'host': parts.netloc,
+        'method': method.upper(),
+        'path': parts.path,
+        'status': status,
+        'ms': round(seconds * 1000, 1),
+    }
+    if error:
+        event['error'] = error
+    with _http_lock:
+        _http_events.append(event)
+
+
+def instrument_session(session):
+    """requests.Session의 모든 요청(실패 포함)을 기록하도록 감싸서 같은 세션을 반환."""
+    request = session.request
+
+    @functools.wraps(request)
+    def timed_request(method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            res = request(method, url, *args, **kwargs)
+        except Exception as e:
+            record_http(method, url, None, time.perf_counter() - start, error=type(e).__name__)
+            raise
+        record_http(method, url, res.status_code, time.perf_counter() - start)
+        return res
+
+    session.request = timed_request
+    return session
+
+
+def http_since(ts: float):
+    with _http_lock:
+        return [e for e in _http_events if e['ts'] >= ts]
+
+
+# ----------------------
+# 결과: 사이드바 패널 + JSON Lines
+# ----------------------
+def _summary(run: Run, total: float, complete: bool = True) -> dict:
+    return {
+        'ts': round(run.started, 3),
+        'app': run.app,
+        'complete': complete,
+        'total_ms': round(total * 1000, 1),
+        'sections': [{'name': n, 'ms': round(s * 1000, 1)} for n, s in run.sections],
+        'cache': {n: dict(v, seconds=round(v['seconds'], 4)) for n, v in run.cache.items()},
+        'http': http_since(run.started),
+    }
+
+
+def _write_log(run: Run, total: float, complete: bool = True):
+    run.finished = True
+    if not PERF_LOG_PATH:
+        return
+    line = json.dumps(_summary(run, total, complete), ensure_ascii=False)
+    with _log_lock:
+        with open(PERF_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def finish():
+    """스크립트 맨 끝에서 호출: 로그를 남기고, 켜져 있으면 사이드바에 결과를 표시."""
+    run = current_run()
+    if run is None or run.finished:
+        return
+    total = run.close()
+    _write_log(run, total)
+    if not st.sidebar.checkbox('성능 디버그 패널', value=PERF_DEBUG, key='perf_debug_panel'):
+        return
+    summary = _summary(run, total)
+    with st.sidebar.expander(f"실행 {summary['total_ms']:.0f} ms", expanded=True):
+        st.caption('구간')
+        st.dataframe([s for s in summary['sections'] if s['ms'] >= 0.1], hide_index=True)
+        if summary['cache']:
+            st.caption('캐시 (적중/미스)')
+            st.dataframe([{'function': n, **v} for n, v in summary['cache'].items()], hide_index=True)
+        if summary['http']:
+            st.caption(f"HTTP {len(summary['http'])}건")
+            st.dataframe(summary['http'][-PANEL_HTTP_ROWS:], hide_index=True)
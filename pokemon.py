@@ -1,64 +1,542 @@
 # streamlit_pokemon_cute_with_image.py
 
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import requests
 
-st.set_page_config(page_title='🌟 포켓몬 헬퍼 🌟', layout='wide')
-st.markdown("<h1 style='text-align: center; color: #FF5C5C;'>🐾 포켓몬 헬퍼 🐾</h1>", unsafe_allow_html=True)
-st.markdown("<p style='text-align: center;'>영어 이름을 입력하면 타입, 진화 단계, 추천 스킬과 함께 이미지를 보여줘요! 💖</p>", unsafe_allow_html=True)
-st.markdown("---")
+import perf
+from sprite_cache import SpriteCache, mime_type
+
+# --------------------------
+# 응답 캐시 설정 (환경 변수로 덮어쓸 수 있음)
+# --------------------------
+CACHE_PATH = os.environ.get('POKE_CACHE_PATH', '.pokeapi_cache.sqlite3')
+CACHE_TTL = int(os.environ.get('POKE_CACHE_TTL', 7 * 24 * 3600))  # 정상 응답 유지 시간(초)
+CACHE_NEGATIVE_TTL = int(os.environ.get('POKE_CACHE_NEGATIVE_TTL', 3600))  # 404 응답 유지 시간(초)
+CACHE_MAX_BYTES = int(os.environ.get('POKE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+OFFLINE_DEFAULT = os.environ.get('POKE_OFFLINE', '') == '1'
+
+POKEAPI_BASE = os.environ.get('POKEAPI_BASE', 'https://pokeapi.co/api/v2').rstrip('/')  # 로컬 대역 서버로 바꿀 수 있음
+REQUEST_TIMEOUT = (3.05, 10)  # (연결, 읽기) 초
+CARD_WORKERS = int(os.environ.get('POKE_CARD_WORKERS', 16))  # 동시에 조회하는 카드 수
+FETCH_WORKERS = int(os.environ.get('POKE_FETCH_WORKERS', 32))  # 동시 HTTP 요청 수 (= 커넥션 풀 크기)
+MAX_BATCH = 200
+MAX_EDIT_DISTANCE = 2  # 오타 교정 허용 거리
+SUGGESTION_LIMIT = 5
+NAME_INDEX_RETRY = 60  # 이름 목록을 받지 못했을 때 다시 요청하기까지 기다리는 시간(초)
+CARDS_PER_ROW = 3
+SPRITE_WIDTH = 150  # 카드에 표시되는 이미지 폭(px)
+
+
+class ResponseCache:
+    """URL을 키로 하는 SQLite 응답 캐시.
+
+    - TTL이 지난 항목은 온라인 모드에서 다시 요청합니다(오프라인 재생 모드에서는 그대로 사용).
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다(LRU).
+    - 파일 기반이라 Streamlit 세션과 프로세스 재시작 사이에서 공유됩니다.
+    """
+
+    def __init__(self, path, ttl, negative_ttl, max_bytes):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' url TEXT PRIMARY KEY,'
+                ' status INTEGER NOT NULL,'
+                ' body TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+            self._conn.commit()
+
+    def get(self, url, allow_stale=False):
+        """캐시된 (status, data)를 반환. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, body, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, body, fetched_at = row
+            ttl = self.ttl if status == 200 else self.negative_ttl
+            if not allow_stale and now - fetched_at > ttl:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+            self._conn.commit()
+        return status, (json.loads(body) if status == 200 else None)
+
+    def put(self, url, status, body):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, status, body, size, fetched_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (url, status, body, len(body.encode('utf-8')), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for url, size in self._conn.execute('SELECT url, size FROM responses ORDER BY accessed_at'):
+            victims.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', victims)
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        return count, size
+
+
+class EvolutionIndex:
+    """종(species) 이름 → 진화 트리 위치 인덱스.
+
+    진화 체인 문서를 한 번 분석해 SQLite에 저장하고, 시작 시 메모리 dict로 적재합니다.
+    분기 진화(이브이, 배루키 등)도 트리 전체를 기준으로 단계를 계산하므로,
+    조회는 추가 HTTP 요청 없는 dict 조회 한 번입니다.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS evo_nodes ('
+                ' species TEXT PRIMARY KEY,'
+                ' chain_id INTEGER NOT NULL,'
+                ' node TEXT NOT NULL)'
+            )
+            self._conn.commit()
+            rows = self._conn.execute('SELECT species, chain_id, node FROM evo_nodes').fetchall()
+        self._nodes = {species: json.loads(node) for species, _, node in rows}
+        self._chain_ids = {chain_id for _, chain_id, _ in rows}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def lookup(self, species):
+        return self._nodes.get(species)
+
+    def has_chain(self, chain_id):
+        return chain_id in self._chain_ids
+
+    def add_chain(self, chain_id, chain):
+        """진화 체인 문서의 'chain' 트리를 분석해 모든 종의 위치를 저장합니다."""
+        nodes = {}
+
+        def walk(link, depth, parent):
+            name = link.get('species', {}).get('name', '')
+            children = [c.get('species', {}).get('name', '') for c in link.get('evolves_to', [])]
+            heights = [walk(child, depth + 1, name) for child in link.get('evolves_to', [])]
+            height = max(heights) + 1 if heights else 0
+            nodes[name] = {
+                'chain_id': chain_id,
+                'stage': depth + 1,
+                # 이 종을 지나는 가장 긴 진화 경로의 길이
+                'stages': depth + 1 + height,
+                'parent': parent,
+                'children': children,
+            }
+            return height
+
+        walk(chain, 0, None)
+        for name, node in nodes.items():
+            parent = nodes.get(node['parent'])
+            node['siblings'] = [s for s in parent['children'] if s != name] if parent else []
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO evo_nodes (species, chain_id, node) VALUES (?, ?, ?)',
+                [(name, chain_id, json.dumps(node)) for name, node in nodes.items()],
+            )
+            self._conn.commit()
+            self._nodes.update(nodes)
+            self._chain_ids.add(chain_id)
+
+    def describe(self, species):
+        node = self._nodes.get(species)
+        if node is None:
+            return '정보 없음'
+        text = f"Stage {node['stage']} / {node['stages']}"
+        if node['siblings']:
+            text += f" (분기: {', '.join(s.title() for s in node['siblings'])})"
+        return text
+
+
+def chain_id_from_url(url):
+    return int(url.rstrip('/').rsplit('/', 1)[-1])
+
+
+class NameIndex:
+    """전체 포켓몬 이름 목록에 대한 로컬 인덱스.
+
+    - 정렬 배열 + bisect로 접두어 자동 완성
+    - 삭제 변형(symmetric delete) 사전으로 편집 거리 MAX_EDIT_DISTANCE 이내 오타 교정
+    네트워크 요청 전에 이름을 검사해, 오타 때문에 404 왕복을 하지 않도록 합니다.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(set(names))
+        self._known = set(self.names)
+        self._deletes = {}
+        for name in self.names:
+            for variant in _deletes(name, MAX_EDIT_DISTANCE):
+                self._deletes.setdefault(variant, []).append(name)
+
+    def __contains__(self, name):
+        return name in self._known
+
+    def __len__(self):
+        return len(self.names)
+
+    def complete(self, prefix, limit=SUGGESTION_LIMIT):
+        """prefix로 시작하는 이름을 사전순으로 최대 limit개."""
+        out = []
+        i = bisect_left(self.names, prefix)
+        while i < len(self.names) and len(out) < limit and self.names[i].startswith(prefix):
+            out.append(self.names[i])
+            i += 1
+        return out
+
+    def suggest(self, word, limit=SUGGESTION_LIMIT):
+        """편집 거리가 가까운 순서로 교정 후보를 반환합니다."""
+        candidates = set()
+        for variant in _deletes(word, MAX_EDIT_DISTANCE):
+            candidates.update(self._deletes.get(variant, ()))
+        scored = []
+        for name in candidates:
+            dist = edit_distance(word, name, MAX_EDIT_DISTANCE)
+            if dist <= MAX_EDIT_DISTANCE:
+                scored.append((dist, name))
+        scored.sort()
+        return [name for _, name in scored[:limit]]
+
+
+def _deletes(word, max_distance):
+    """word에서 글자를 최대 max_distance개 지운 모든 변형 (word 자신 포함)."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def edit_distance(a, b, limit):
+    """인접 전치를 포함한 편집 거리(OSA). limit를 넘으면 limit + 1을 반환합니다."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+@perf.cache_resource
+def get_response_cache():
+    return ResponseCache(CACHE_PATH, CACHE_TTL, CACHE_NEGATIVE_TTL, CACHE_MAX_BYTES)
+
 
-poke_name_eng = st.text_input('포켓몬 이름 입력 (영어) 🔍')
-
-if poke_name_eng:
-    poke_name_eng = poke_name_eng.strip().lower()
-    st.markdown(f"### 🔎 {poke_name_eng.title()} 정보 조회 중...")
-    try:
-        # 포켓몬 기본 정보
-        poke_url = f'https://pokeapi.co/api/v2/pokemon/{poke_name_eng}'
-        poke_res = requests.get(poke_url)
-        if poke_res.status_code != 200:
-            st.warning('❌ 해당 포켓몬을 찾을 수 없습니다. 이름을 확인해주세요!')
-        else:
-            poke_data = poke_res.json()
+@perf.cache_resource
+def get_evolution_index():
+    return EvolutionIndex(CACHE_PATH)
+
+
+@perf.cache_resource
+def get_http_session():
+    """커넥션 풀을 재사용하는 공유 세션 (매 요청마다 새 TLS 연결을 맺지 않도록)."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS, max_retries=1)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return perf.instrument_session(session)
+
+
+class NameIndexLoader:
+    """이름 목록을 작업 스레드에서 받아 NameIndex로 만듭니다 — 스크립트 스레드는 기다리지 않습니다.
+
+    캐시에 목록이 있으면 바로 만들고, 없으면 백그라운드로 요청한 뒤 준비될 때까지 None을 반환합니다.
+    요청이 실패하면 NAME_INDEX_RETRY초 동안은 다시 요청하지 않습니다.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.url = f'{POKEAPI_BASE}/pokemon?limit=100000'
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+        self._index = None
+        self._retry_at = 0.0
+
+    @staticmethod
+    def _build(status, listing):
+        if status != 200:
+            raise LookupError('pokemon name list unavailable')
+        return NameIndex(r['name'] for r in listing.get('results', []))
+
+    def get(self):
+        with self._lock:
+            if self._index is None and self._future is None:
+                hit = self.client.cache.get(self.url, allow_stale=self.client.offline)
+                if hit is not None and hit[0] == 200:
+                    self._index = self._build(*hit)
+                elif not self.client.offline and time.time() >= self._retry_at:
+                    self._future = self._pool.submit(lambda: self._build(*self.client.fetch_json(self.url)))
+            if self._future is not None and self._future.done():
+                try:
+                    self._index = self._future.result()
+                except Exception:
+                    self._retry_at = time.time() + NAME_INDEX_RETRY
+                self._future = None
+            return self._index
+
+
+@perf.cache_resource
+def get_name_index_loader(offline):
+    client = PokeClient(get_response_cache(), get_http_session(), get_executors(), get_evolution_index(), get_sprite_cache(), offline)
+    return NameIndexLoader(client)
+
+
+def get_name_index(offline):
+    """이름 인덱스. 아직 받는 중이거나 받을 수 없으면(오프라인 캐시 없음, 네트워크 오류) None."""
+    return get_name_index_loader(offline).get()
+
+
+@perf.cache_resource
+def get_sprite_cache():
+    return SpriteCache(session=get_http_session(), timeout=REQUEST_TIMEOUT)
+
+
+@perf.cache_resource
+def get_executors():
+    """(카드 단위 풀, 개별 요청 풀). 서로 다른 풀을 써서 중첩 대기 시 교착을 피합니다."""
+    return ThreadPoolExecutor(max_workers=CARD_WORKERS), ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+
+
+class PokeClient:
+    """캐시 → 풀링된 세션 순서로 PokeAPI를 조회하고, 카드 정보를 병렬로 모읍니다."""
+
+    def __init__(self, cache, session, executors, evo_index, sprites, offline=False):
+        self.cache = cache
+        self.evo_index = evo_index
+        self.sprites = sprites
+        self.session = session
+        self.card_pool, self.fetch_pool = executors
+        self.offline = offline
+
+    def fetch_json(self, url):
+        """캐시를 먼저 확인하고, 없으면 PokeAPI에 요청합니다.
+
+        (status, data)를 반환하며, 오프라인 재생 모드에서 캐시에 없으면 (None, None).
+        """
+        hit = self.cache.get(url, allow_stale=self.offline)
+        if hit is not None:
+            return hit
+        if self.offline:
+            return None, None
+        res = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        # 서버 오류(5xx 등)는 일시적일 수 있으므로 캐시하지 않음
+        if res.status_code in (200, 404):
+            self.cache.put(url, res.status_code, res.text)
+        return res.status_code, (res.json() if res.status_code == 200 else None)
+
+    def fetch_card(self, name):
+        """이름 하나에 대한 카드 정보 dict. Streamlit 호출 없이 작업 스레드에서 실행됩니다."""
+        card = {'query': name}
+        try:
+            poke_future = self.fetch_pool.submit(self.fetch_json, f'{POKEAPI_BASE}/pokemon/{name}')
+            # 진화 인덱스에 없는 경우에만 종(species) 정보를 동시에 요청 (대부분 종 이름 == 포켓몬 이름)
+            species_future = None
+            if self.evo_index.lookup(name) is None:
+                species_future = self.fetch_pool.submit(self.fetch_json, f'{POKEAPI_BASE}/pokemon-species/{name}')
+            poke_status, poke_data = poke_future.result()
+            if poke_status is None:
+                card['status'] = 'offline_miss'
+                return card
+            if poke_status != 200:
+                card['status'] = 'not_found'
+                return card
+
+            card['status'] = 'ok'
             # 영어 이름
-            english_name = poke_data.get('name', '').title()
+            card['name'] = poke_data.get('name', '').title()
             # 타입
-            types = [t['type']['name'].title() for t in poke_data.get('types', [])]
+            card['types'] = [t['type']['name'].title() for t in poke_data.get('types', [])]
             # 추천 스킬 (앞 5개)
-            moves = [m['move']['name'].replace('-', ' ').title() for m in poke_data.get('moves', [])[:5]]
+            card['moves'] = [m['move']['name'].replace('-', ' ').title() for m in poke_data.get('moves', [])[:5]]
             # 포켓몬 이미지
-            image_url = poke_data.get('sprites', {}).get('front_default')
-
-            # 진화 단계 조회
-            species_url = poke_data.get('species', {}).get('url')
-            evo_stage = '정보 없음'
-            if species_url:
-                species_res = requests.get(species_url).json()
-                evo_chain_url = species_res.get('evolution_chain', {}).get('url')
+            card['image_url'] = poke_data.get('sprites', {}).get('front_default')
+            # 표시 폭으로 줄인 썸네일 (디스크 캐시)
+            card['image'] = self.sprites.get(card['image_url'], SPRITE_WIDTH, self.offline) if card['image_url'] else None
+
+            # 진화 단계 — 인덱스에 없으면 체인을 한 번 받아 가족 전체를 색인
+            species = poke_data.get('species', {})
+            species_name = species.get('name', name)
+            if self.evo_index.lookup(species_name) is None:
+                species_status, species_res = species_future.result() if species_future else (None, None)
+                # 폼 이름(예: deoxys-normal)이면 species URL로 다시 요청
+                if species_status != 200 and species.get('url'):
+                    species_status, species_res = self.fetch_json(species['url'])
+                evo_chain_url = (species_res or {}).get('evolution_chain', {}).get('url')
                 if evo_chain_url:
-                    evo_chain_res = requests.get(evo_chain_url).json()
-                    chain = evo_chain_res.get('chain', {})
-                    stages = []
-                    while chain:
-                        species_name = chain.get('species', {}).get('name', '')
-                        if species_name:
-                            stages.append(species_name.title())
-                        evolves_to = chain.get('evolves_to')
-                        chain = evolves_to[0] if evolves_to else None
-                    if english_name in stages:
-                        evo_stage = f'Stage {stages.index(english_name)+1} / {len(stages)}'
-
-            # 귀여운 카드 스타일
-            st.markdown(f"""
-            <div style='background-color: #FFF0F5; border-radius: 15px; padding: 20px; margin: 10px; text-align:center; box-shadow: 3px 3px 10px #FFC0CB;'>
-                <h2 style='color:#FF69B4;'>✨ {english_name} ✨</h2>
-                {f"<img src='{image_url}' width='150' style='border-radius:10px;' />" if image_url else ""}
-                <p style='font-size:18px;'>💠 타입: {' / '.join(types)}</p>
-                <p style='font-size:18px;'>🔺 진화 단계: {evo_stage}</p>
-                <p style='font-size:18px;'>⭐ 추천 스킬: {', '.join(moves)}</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-    except Exception as e:
-        st.error(f'⚠️ 정보 조회 중 오류 발생: {e}')
+                    self.index_chain(evo_chain_url)
+            card['evo_stage'] = self.evo_index.describe(species_name)
+        except Exception as e:
+            card['status'] = 'error'
+            card['error'] = str(e)
+        return card
+
+    def fetch_cards(self, names):
+        """여러 이름을 제한된 병렬도로 조회. 입력 순서대로 반환합니다."""
+        return list(self.card_pool.map(self.fetch_card, names))
+
+    def index_chain(self, url):
+        chain_id = chain_id_from_url(url)
+        if self.evo_index.has_chain(chain_id):
+            return
+        status, data = self.fetch_json(url)
+        if status == 200:
+            self.evo_index.add_chain(chain_id, data.get('chain', {}))
+
+    def refresh_evolution_index(self):
+        """전체 진화 체인 목록을 받아 아직 색인하지 않은 체인만 병렬로 추가합니다."""
+        status, listing = self.fetch_json(f'{POKEAPI_BASE}/evolution-chain?limit=100000')
+        if status != 200:
+            return 0
+        urls = [r['url'] for r in listing.get('results', [])
+                if not self.evo_index.has_chain(chain_id_from_url(r['url']))]
+        list(self.fetch_pool.map(self.index_chain, urls))
+        return len(urls)
+
+
+def parse_names(*sources):
+    """쉼표/줄바꿈으로 구분된 이름 목록을 소문자로 정리하고 중복을 제거합니다."""
+    names = []
+    for text in sources:
+        for part in re.split(r'[,\n]', text or ''):
+            part = part.strip().lower()
+            if part and part not in names:
+                names.append(part)
+    return names[:MAX_BATCH]
+
+
+def apply_suggestion(query, suggestion):
+    """입력창의 query 부분을 교정 후보로 바꿉니다 (버튼 콜백)."""
+    parts = [p.strip() for p in st.session_state.get('poke_query', '').split(',') if p.strip()]
+    lowered = [p.lower() for p in parts]
+    if query in lowered:
+        parts[lowered.index(query)] = suggestion
+    else:
+        parts.append(suggestion)
+    st.session_state['poke_query'] = ', '.join(parts)
+
+
+def render_card(card):
+    if card['status'] == 'offline_miss':
+        st.warning(f"📦 {card['query']}: 오프라인 모드 — 캐시에 저장된 정보가 없습니다.")
+    elif card['status'] == 'not_found':
+        st.warning(f"❌ {card['query']}: 해당 포켓몬을 찾을 수 없습니다. 이름을 확인해주세요!")
+        if card.get('suggestions'):
+            st.caption('💡 혹시 이 포켓몬인가요?')
+            for suggestion in card['suggestions']:
+                st.button(suggestion.title(), key=f"suggest-{card['query']}-{suggestion}",
+                          on_click=apply_suggestion, args=(card['query'], suggestion))
+    elif card['status'] == 'error':
+        st.error(f"⚠️ {card['query']}: 정보 조회 중 오류 발생: {card['error']}")
+    else:
+        image_url = card['image_url']
+        if card['image']:
+            image_url = f"data:{mime_type(card['image'])};base64,{base64.b64encode(card['image']).decode('ascii')}"
+        # 귀여운 카드 스타일
+        st.markdown(f"""
+        <div style='background-color: #FFF0F5; border-radius: 15px; padding: 20px; margin: 10px; text-align:center; box-shadow: 3px 3px 10px #FFC0CB;'>
+            <h2 style='color:#FF69B4;'>✨ {card['name']} ✨</h2>
+            {f"<img src='{image_url}' width='{SPRITE_WIDTH}' style='border-radius:10px;' />" if image_url else ""}
+            <p style='font-size:18px;'>💠 타입: {' / '.join(card['types'])}</p>
+            <p style='font-size:18px;'>🔺 진화 단계: {card['evo_stage']}</p>
+            <p style='font-size:18px;'>⭐ 추천 스킬: {', '.join(card['moves'])}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+perf.start_run('pokemon')
+st.set_page_config(page_title='🌟 포켓몬 헬퍼 🌟', layout='wide')
+st.markdown("<h1 style='text-align: center; color: #FF5C5C;'>🐾 포켓몬 헬퍼 🐾</h1>", unsafe_allow_html=True)
+st.markdown("<p style='text-align: center;'>영어 이름을 입력하면 타입, 진화 단계, 추천 스킬과 함께 이미지를 보여줘요! 💖</p>", unsafe_allow_html=True)
+st.markdown("---")
+
+perf.mark('사이드바')
+offline = st.sidebar.checkbox('📦 오프라인 재생 모드 (캐시만 사용)', value=OFFLINE_DEFAULT)
+cached_count, cached_size = get_response_cache().stats()
+st.sidebar.caption(f'캐시: {cached_count}개 응답, {cached_size / 1024:.0f} KB')
+evo_index = get_evolution_index()
+if st.sidebar.button('🌳 진화 인덱스 갱신'):
+    added = PokeClient(get_response_cache(), get_http_session(), get_executors(), evo_index, get_sprite_cache(), offline).refresh_evolution_index()
+    st.sidebar.success(f'진화 체인 {added}개를 새로 색인했습니다.')
+st.sidebar.caption(f'진화 인덱스: {len(evo_index)}종')
+name_file = st.sidebar.file_uploader('이름 목록 파일 (txt/csv, 쉼표·줄바꿈 구분)', type=['txt', 'csv'])
+
+perf.mark('이름 인덱스')
+poke_name_eng = st.text_input('포켓몬 이름 입력 (영어, 여러 마리는 쉼표로 구분) 🔍', key='poke_query')
+names = parse_names(poke_name_eng, name_file.getvalue().decode('utf-8-sig') if name_file else '')
+name_index = get_name_index(offline)
+st.sidebar.caption(f'이름 인덱스: {len(name_index)}개' if name_index is not None else '이름 인덱스: 준비 중 (오타 교정 없이 조회)')
+
+perf.mark('카드 조회')
+if names:
+    client = PokeClient(get_response_cache(), get_http_session(), get_executors(), evo_index, get_sprite_cache(), offline)
+    # 이름 인덱스에 없는 이름은 요청하지 않고 자동 완성/오타 교정 후보만 보여줌 (도감 번호는 바로 요청)
+    known = [n for n in names if name_index is None or n.isdigit() or n in name_index]
+    fetched = dict(zip(known, client.fetch_cards(known)))
+    cards = [
+        fetched.get(n) or {'query': n, 'status': 'not_found',
+                           'suggestions': name_index.complete(n) or name_index.suggest(n)}
+        for n in names
+    ]
+    perf.mark('카드 표시')
+    if len(cards) == 1:
+        st.markdown(f"### 🔎 {names[0].title()} 정보 조회 중...")
+        render_card(cards[0])
+    else:
+        st.markdown(f"### 🔎 {len(names)}마리 정보 조회 중...")
+        for row_start in range(0, len(cards), CARDS_PER_ROW):
+            for col, card in zip(st.columns(CARDS_PER_ROW), cards[row_start:row_start + CARDS_PER_ROW]):
+                with col:
+                    render_card(card)
+
+perf.finish()
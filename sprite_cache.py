@@ -0,0 +1,135 @@
+"""
+sprite_cache.py
+
+pokemon.py / nintendo.py가 함께 쓰는 이미지 썸네일 캐시
+- 원격 이미지를 한 번만 내려받아 화면에 표시되는 폭으로 줄인 뒤 디스크에 저장합니다.
+- 캐시 폴더 전체 크기가 상한을 넘으면 가장 오래 사용하지 않은 파일부터 삭제합니다(LRU).
+- 렌더링 시에는 저장된 바이트를 `st.image` 등에 바로 넘기므로 외부 이미지 서버에 의존하지 않습니다.
+- 의존성: requests, Pillow(optional — 없으면 원본 이미지를 줄이지 않고 그대로 저장)
+  둘 다 처음 이미지를 내려받을 때 import합니다 (캐시에 있는 이미지만 쓰면 import하지 않음).
+"""
+
+import hashlib
+import io
+import os
+import threading
+from functools import lru_cache
+from typing import Optional
+
+SPRITE_CACHE_DIR = os.environ.get('SPRITE_CACHE_DIR', '.sprite_cache')
+SPRITE_CACHE_MAX_BYTES = int(os.environ.get('SPRITE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+
+@lru_cache(maxsize=None)
+def _requests():
+    try:
+        import requests
+    except Exception:
+        return None
+    return requests
+
+
+@lru_cache(maxsize=None)
+def _pil_image():
+    try:
+        from PIL import Image
+    except Exception:
+        return None
+    return Image
+
+
+def mime_type(data: bytes) -> str:
+    """이미지 바이트의 MIME 타입 (data URI용)."""
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if data.startswith(b'GIF8'):
+        return 'image/gif'
+    return 'application/octet-stream'
+
+
+def resize_image(data: bytes, width: int) -> bytes:
+    """width보다 넓은 이미지를 비율을 유지해 줄입니다. Pillow가 없으면 원본을 반환."""
+    Image = _pil_image()
+    if Image is None:
+        return data
+    img = Image.open(io.BytesIO(data))
+    if img.width <= width:
+        return data
+    height = max(1, round(img.height * width / img.width))
+    img = img.resize((width, height), Image.LANCZOS)
+    out = io.BytesIO()
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img.save(out, format='PNG', optimize=True)
+    else:
+        img.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+    return out.getvalue()
+
+
+class SpriteCache:
+    """URL + 표시 폭을 키로 하는 디스크 썸네일 캐시 (크기 상한, LRU 삭제)."""
+
+    def __init__(self, directory: str = SPRITE_CACHE_DIR, max_bytes: int = SPRITE_CACHE_MAX_BYTES,
+                 session=None, timeout=(3.05, 10)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.session = session
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        # 다른 스레드가 쓰는 중인 임시 파일은 제외
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.endswith('.tmp')]
+
+    def _path(self, url: str, width: int) -> str:
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}_{width}')
+
+    def get(self, url: str, width: int, offline: bool = False) -> Optional[bytes]:
+        """썸네일 바이트를 반환. 받을 수 없으면(오프라인 캐시 없음, 네트워크 오류) None."""
+        path = self._path(url, width)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # LRU 순서 갱신
+            return data
+        except OSError:
+            pass
+        client = None if offline else self.session or _requests()
+        if client is None:
+            return None
+        try:
+            res = client.get(url, timeout=self.timeout)
+            res.raise_for_status()
+            data = resize_image(res.content, width)
+        except Exception:
+            return None
+        self._store(path, data)
+        return data
+
+    def _store(self, path: str, data: bytes):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        self._total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._total <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._total -= size
+            except OSError:
+                pass